@@ -1,26 +1,11 @@
 # exams/admin.py
-import os
-import json
 import logging
-import time
-import socket
-import ssl
-import requests
-import gc
 import io
 
 from django.contrib import admin, messages
-from django.utils.html import format_html
-from django.core import mail
-from django.template.loader import render_to_string
-from django.utils import timezone
-from django.contrib.auth.models import User
-from django.conf import settings
-from django.core.paginator import Paginator
-from django.shortcuts import redirect
-from django.urls import path, reverse
-
-import django_rq
+from django.db.models import Count
+from django.utils.html import format_html, format_html_join
+from django.utils.safestring import mark_safe
 
 from .models import Course, Question, TestSession, GroupTest, Material
 
@@ -30,8 +15,9 @@ logger = logging.getLogger(__name__)
 @admin.register(Material)
 class MaterialAdmin(admin.ModelAdmin):
     list_display = ('id', 'name', 'course', 'uploaded_by', 'uploaded_at', 'download_link')
+    list_select_related = ('course', 'uploaded_by')
     search_fields = ('name', 'course__name', 'tags')
-    list_filter = ('course', 'uploaded_at')
+    list_filter = ('course', 'is_private', 'uploaded_at')
     readonly_fields = ('uploaded_by', 'uploaded_at')
     exclude = ('file_url',)
 
@@ -49,12 +35,17 @@ class GroupTestAdmin(admin.ModelAdmin):
     list_filter = ('course', 'created_by', 'scheduled_start')
     readonly_fields = ('created_at', 'invitee_list')
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(_invitee_count=Count('invites'))
+
     def invitee_count(self, obj):
-        return len(obj.invitees.split(',')) if obj.invitees else 0
+        return obj._invitee_count
     invitee_count.short_description = 'Invitees'
+    invitee_count.admin_order_field = '_invitee_count'
 
     def invitee_list(self, obj):
-        return format_html('<br>'.join(obj.invitees.split(','))) if obj.invitees else '-'
+        emails = [invite.email for invite in obj.invites.all()]
+        return format_html_join(mark_safe('<br>'), '{}', ((email,) for email in emails)) if emails else '-'
     invitee_list.short_description = 'Invitee List'
 
 
@@ -243,6 +234,7 @@ class SpecialChoiceAdmin(admin.ModelAdmin):
 @admin.register(SpecialEnrollment)
 class SpecialEnrollmentAdmin(admin.ModelAdmin):
     list_display = ('user', 'course', 'enrolled_at', 'started', 'submitted', 'score')
+    list_select_related = ('user', 'course')
     actions = ['export_results']
 
     def export_results(self, request, queryset):
@@ -252,7 +244,7 @@ class SpecialEnrollmentAdmin(admin.ModelAdmin):
             return
         try:
             rows = []
-            for e in queryset.select_related('user'):
+            for e in queryset.select_related('user', 'user__profile'):
                 profile = getattr(e.user, 'profile', None)
                 rows.append({
                     'name': e.user.get_full_name() or str(e.user),
@@ -283,6 +275,8 @@ class SpecialEnrollmentAdmin(admin.ModelAdmin):
 @admin.register(SpecialAnswer)
 class SpecialAnswerAdmin(admin.ModelAdmin):
     list_display = ('enrollment', 'question', 'choice', 'answered_at')
+    # Each column's __str__ walks further relations (user, course titles)
+    list_select_related = ('enrollment__user', 'enrollment__course', 'question__course', 'choice__question')
 
 
 @admin.register(UserProfile)
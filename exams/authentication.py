@@ -0,0 +1,66 @@
+# exams/authentication.py
+import time
+import hashlib
+import threading
+
+from cachetools import TTLCache
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+# Validated access tokens keyed by a digest of the raw token. Entries live for
+# at most 30s and are re-checked against their own `exp` on every hit, so a
+# cached token is never accepted past its expiry.
+_TOKEN_CACHE = TTLCache(maxsize=10000, ttl=30)
+_TOKEN_CACHE_LOCK = threading.Lock()
+
+
+def _token_key(raw_token):
+    return hashlib.sha256(raw_token).hexdigest()[:32]
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication that skips signature verification for tokens seen
+    in the last few seconds by this process."""
+
+    def get_validated_token(self, raw_token):
+        key = _token_key(raw_token)
+        with _TOKEN_CACHE_LOCK:
+            token = _TOKEN_CACHE.get(key)
+        if token is not None and token.payload.get('exp', 0) > time.time():
+            return token
+
+        token = super().get_validated_token(raw_token)
+        with _TOKEN_CACHE_LOCK:
+            _TOKEN_CACHE[key] = token
+        return token
+
+    def get_user(self, validated_token):
+        """Same checks as simplejwt's get_user, but loads the profile and
+        lecturer account in the same query so views can read them in memory."""
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        try:
+            user = self.user_model.objects.select_related(
+                'profile', 'lecturer_account'
+            ).get(**{api_settings.USER_ID_FIELD: user_id})
+        except self.user_model.DoesNotExist:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        if not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(
+                api_settings.REVOKE_TOKEN_CLAIM
+            ) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(
+                    _("The user's password has been changed."), code="password_changed"
+                )
+
+        return user
@@ -0,0 +1,61 @@
+# exams/backends.py
+import hmac
+import hashlib
+import threading
+
+from cachetools import TTLCache
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+
+UserModel = get_user_model()
+
+# Recent successful logins: HMAC(username, sha256(password)) -> (user id,
+# password hash at login time). Entries live 15s; a hit is only honoured if
+# the stored hash is unchanged, so a password change invalidates it at once.
+_LOGIN_CACHE = TTLCache(maxsize=4096, ttl=15)
+_LOGIN_CACHE_LOCK = threading.Lock()
+
+
+def _login_key(username, password):
+    digest = hashlib.sha256(password.encode()).hexdigest()
+    return hmac.new(
+        settings.SECRET_KEY.encode(), f"{username}:{digest}".encode(), hashlib.sha256
+    ).digest()
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend that skips the password hasher for a login repeated
+    within a few seconds, and loads lecturer_account with the user."""
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+
+        users = UserModel._default_manager.select_related('lecturer_account')
+        key = _login_key(username, password)
+        with _LOGIN_CACHE_LOCK:
+            cached = _LOGIN_CACHE.get(key)
+        if cached is not None:
+            user_id, password_hash = cached
+            user = users.filter(pk=user_id).first()
+            if user is not None and user.password == password_hash and self.user_can_authenticate(user):
+                return user
+            with _LOGIN_CACHE_LOCK:
+                _LOGIN_CACHE.pop(key, None)
+
+        try:
+            user = users.get(**{UserModel.USERNAME_FIELD: username})
+        except UserModel.DoesNotExist:
+            # Run the default password hasher once to reduce the timing
+            # difference between an existing and a nonexistent user (#20760).
+            UserModel().set_password(password)
+            return None
+
+        if user.check_password(password) and self.user_can_authenticate(user):
+            with _LOGIN_CACHE_LOCK:
+                _LOGIN_CACHE[key] = (user.pk, user.password)
+            return user
+        return None
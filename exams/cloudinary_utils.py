@@ -6,6 +6,7 @@ from django.conf import settings
 
 try:
     import cloudinary
+    import cloudinary.uploader
     import cloudinary.utils
     CLOUDINARY_AVAILABLE = True
 except ImportError:
@@ -13,6 +14,42 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# Bytes per request when streaming uploads to Cloudinary (its minimum is 5 MB)
+CLOUDINARY_UPLOAD_CHUNK_SIZE = 6_000_000
+
+
+def upload_material_file(source):
+    """
+    Upload a material file to Cloudinary as a public 'raw' resource.
+
+    Args:
+        source: a local file path or a file-like object
+    
+    Returns:
+        The secure URL of the uploaded file. Raises on upload failure or
+        when Cloudinary returns no URL.
+    """
+    # Sent in chunks so only one chunk is held in memory at a time
+    upload_result = cloudinary.uploader.upload_large(
+        source,
+        resource_type="raw",   # raw to preserve PDFs/docs
+        folder="materials",
+        type="upload",         # ensure public (not authenticated/signed)
+        chunk_size=CLOUDINARY_UPLOAD_CHUNK_SIZE,
+        use_filename=True,
+        unique_filename=True,  # avoid collisions
+        overwrite=False,
+        timeout=120  # seconds - adjust if you need larger timeouts
+    )
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Cloudinary upload result: %s", upload_result)
+
+    file_url = upload_result.get("secure_url") or upload_result.get("url")
+    if not file_url:
+        logger.error("No URL returned from Cloudinary upload_result=%s", upload_result)
+        raise ValueError("Upload succeeded but no file URL was returned by storage provider.")
+    return file_url
+
 def get_cloudinary_signed_or_public_url(material, expires_in=3600):
     """
     Return a download URL for the given Material instance.
@@ -140,7 +177,7 @@ def _generate_signed_url(public_id, cloud_name, expires_in=3600):
             secure=True,
             expires_in=expires_in,
         )
-        logger.debug(f"✓ Generated signed URL for {public_id} (expires in {expires_in}s)")
+        logger.debug("✓ Generated signed URL for %s (expires in %ss)", public_id, expires_in)
         return url
     except Exception as e:
         logger.error(f"❌ Error generating signed URL for {public_id}: {e}")
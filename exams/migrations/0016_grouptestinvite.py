@@ -0,0 +1,72 @@
+# Move GroupTest.invitees (comma-separated emails) into GroupTestInvite rows
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def copy_invitees(apps, schema_editor):
+    GroupTest = apps.get_model('exams', 'GroupTest')
+    GroupTestInvite = apps.get_model('exams', 'GroupTestInvite')
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+
+    invites = []
+    for group_test in GroupTest.objects.exclude(invitees='').only('id', 'invitees').iterator():
+        emails = dict.fromkeys(e.strip() for e in group_test.invitees.split(',') if e.strip())
+        invites.extend(GroupTestInvite(group_test_id=group_test.id, email=email) for email in emails)
+
+    user_ids = {}
+    for user_id, email in User.objects.filter(
+        email__in={invite.email for invite in invites}
+    ).order_by('-id').values_list('id', 'email'):
+        user_ids[email] = user_id
+    for invite in invites:
+        invite.user_id = user_ids.get(invite.email)
+
+    GroupTestInvite.objects.bulk_create(invites, batch_size=1000)
+
+
+def restore_invitees(apps, schema_editor):
+    GroupTest = apps.get_model('exams', 'GroupTest')
+    GroupTestInvite = apps.get_model('exams', 'GroupTestInvite')
+
+    emails = {}
+    for group_test_id, email in GroupTestInvite.objects.order_by('id').values_list('group_test_id', 'email'):
+        emails.setdefault(group_test_id, []).append(email)
+    for group_test_id, addresses in emails.items():
+        GroupTest.objects.filter(pk=group_test_id).update(invitees=','.join(addresses))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0015_alter_material_fields'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GroupTestInvite',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('email', models.EmailField(db_index=True, max_length=254)),
+                ('group_test', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='invites', to='exams.grouptest')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='group_test_invites', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('group_test', 'email')},
+            },
+        ),
+        # Give the old column a default so the migration can be reversed
+        # on a populated table
+        migrations.AlterField(
+            model_name='grouptest',
+            name='invitees',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.RunPython(copy_invitees, restore_invitees),
+        migrations.RemoveField(
+            model_name='grouptest',
+            name='invitees',
+        ),
+    ]
@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0018_material_course_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='material',
+            name='content_sha256',
+            field=models.CharField(blank=True, db_index=True, max_length=64),
+        ),
+    ]
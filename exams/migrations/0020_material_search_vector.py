@@ -0,0 +1,38 @@
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+from django.db.models import OuterRef, Subquery
+
+
+def populate_search_vector(apps, schema_editor):
+    Course = apps.get_model('exams', 'Course')
+    Material = apps.get_model('exams', 'Material')
+    # Same expression as exams.models.material_search_vector()
+    course_name = Subquery(Course.objects.filter(pk=OuterRef('course_id')).values('name')[:1])
+    Material.objects.update(
+        search_vector=(
+            SearchVector('name', 'tags', weight='A', config='english')
+            + SearchVector(course_name, weight='B', config='english')
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0019_material_content_sha256'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='material',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='material',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='material_search_vector_idx'),
+        ),
+        migrations.RunPython(populate_search_vector, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0021_material_recent_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='material',
+            name='is_private',
+            field=models.BooleanField(default=False),
+        ),
+    ]
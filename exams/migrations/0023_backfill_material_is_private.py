@@ -0,0 +1,20 @@
+# Materials uploaded before is_private existed were always served through
+# signed URLs; keep them that way. Only new uploads default to public.
+
+from django.db import migrations
+
+
+def mark_existing_private(apps, schema_editor):
+    Material = apps.get_model('exams', 'Material')
+    Material.objects.update(is_private=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0022_material_is_private'),
+    ]
+
+    operations = [
+        migrations.RunPython(mark_existing_private, migrations.RunPython.noop),
+    ]
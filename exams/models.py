@@ -1,6 +1,10 @@
 # exams/models.py
 from django.db import models
+from django.db.models import OuterRef, Subquery
+from django.db.models.functions import Upper
 from django.contrib.auth.models import User
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVector, SearchVectorField
 from django.conf import settings
 
 from django.utils import timezone
@@ -20,6 +24,12 @@ class UserProfile(models.Model):
     def __str__(self):
         return f"{self.user.username}'s Profile"
 
+    @property
+    def role(self):
+        # Users authenticated through CachedJWTAuthentication come with
+        # lecturer_account already loaded, so this is an in-memory check.
+        return 'lecturer' if hasattr(self.user, 'lecturer_account') else 'student'
+
 
 class SpecialCourse(models.Model):
     title = models.CharField(max_length=255)
@@ -71,6 +81,10 @@ class SpecialEnrollment(models.Model):
 
     class Meta:
         unique_together = ('user', 'course')
+        indexes = [
+            # Keyset pagination of a user's enrollments (newest first)
+            models.Index(fields=['user', '-enrolled_at', '-id'], name='specialenroll_user_recent_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user} -> {self.course}"
@@ -91,6 +105,20 @@ class Course(models.Model):
     description = models.TextField(blank=True)
     status = models.CharField(max_length=20, default='approved')
 
+    class Meta:
+        indexes = [
+            # Trigram index matching the UPPER(name) LIKE '%q%' that icontains emits
+            GinIndex(OpClass(Upper('name'), name='gin_trgm_ops'), name='course_name_trgm_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        super().save(*args, **kwargs)
+        update_fields = kwargs.get('update_fields')
+        if not adding and (update_fields is None or 'name' in update_fields):
+            # Materials index their course's name in search_vector
+            Material.objects.filter(course=self).update(search_vector=material_search_vector())
+
     def __str__(self):
         return self.name
 
@@ -152,13 +180,43 @@ class GroupTest(models.Model):
     duration_minutes = models.PositiveIntegerField()
     created_by = models.ForeignKey(User, on_delete=models.CASCADE)
     created_at = models.DateTimeField(auto_now_add=True)
-    invitees = models.TextField()  # Comma-separated emails
     scheduled_start = models.DateTimeField()
 
     def __str__(self):
         return self.name
 
 
+class GroupTestInvite(models.Model):
+    """One invited email address for a group test (replaces the old
+    comma-separated GroupTest.invitees column)."""
+    group_test = models.ForeignKey(GroupTest, on_delete=models.CASCADE, related_name='invites')
+    email = models.EmailField(db_index=True)
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='group_test_invites')
+
+    class Meta:
+        unique_together = ('group_test', 'email')
+
+    def __str__(self):
+        return f"{self.email} -> {self.group_test}"
+
+
+# Text search configuration for Material.search_vector and the queries against it
+MATERIAL_SEARCH_CONFIG = 'english'
+
+
+def material_search_vector():
+    """Weighted tsvector: the material's name and tags (A), its course name (B).
+
+    The course name is read through a subquery so the expression can be used
+    in queryset.update(), which does not allow joined field references.
+    """
+    course_name = Subquery(Course.objects.filter(pk=OuterRef('course_id')).values('name')[:1])
+    return (
+        SearchVector('name', 'tags', weight='A', config=MATERIAL_SEARCH_CONFIG)
+        + SearchVector(course_name, weight='B', config=MATERIAL_SEARCH_CONFIG)
+    )
+
+
 class Material(models.Model):
     course = models.ForeignKey('Course', on_delete=models.CASCADE)
     name = models.CharField(max_length=255)
@@ -166,10 +224,42 @@ class Material(models.Model):
 
     # store Cloudinary (public) URL directly
     file = models.URLField(max_length=1000, blank=True)
+    # 'uploading' while a background job sends the file to Cloudinary
+    status = models.CharField(
+        max_length=20,
+        choices=[
+            ('uploading', 'Uploading'),
+            ('ready', 'Ready'),
+            ('failed', 'Failed')
+        ],
+        default='ready'
+    )
+    # SHA-256 of the uploaded bytes, used to skip re-uploading identical files
+    content_sha256 = models.CharField(max_length=64, blank=True, db_index=True)
+    # Stored in a restricted Cloudinary folder; downloads need a signed URL
+    is_private = models.BooleanField(default=False)
+    # Full-text search document, refreshed on save (see material_search_vector)
+    search_vector = SearchVectorField(null=True, editable=False)
 
     uploaded_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     uploaded_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Trigram indexes so the icontains search can skip the sequential scan
+            GinIndex(OpClass(Upper('name'), name='gin_trgm_ops'), name='material_name_trgm_idx'),
+            GinIndex(OpClass(Upper('tags'), name='gin_trgm_ops'), name='material_tags_trgm_idx'),
+            GinIndex(fields=['search_vector'], name='material_search_vector_idx'),
+            # Cursor pagination of the material list (newest first)
+            models.Index(fields=['-uploaded_at', '-id'], name='material_recent_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or {'name', 'tags', 'course'} & set(update_fields):
+            Material.objects.filter(pk=self.pk).update(search_vector=material_search_vector())
+
     @property
     def file_url(self):
         """
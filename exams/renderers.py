@@ -0,0 +1,32 @@
+# exams/renderers.py
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except Exception:
+    orjson = None
+
+
+class ORJSONRenderer(JSONRenderer):
+    """JSONRenderer that encodes with orjson when it is installed.
+
+    Output matches DRF's renderer for API payloads: datetimes, Decimals,
+    lazy strings and other types orjson doesn't handle natively are passed
+    to DRF's JSONEncoder. Indented (browsable/`; indent=`) responses and
+    environments without orjson use the stock renderer.
+    """
+    _encoder = JSONEncoder()
+    _options = (
+        orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if orjson is not None else 0
+    )
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None:
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b''
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        return orjson.dumps(data, default=self._encoder.default, option=self._options)
@@ -1,7 +1,9 @@
 # exams/serializers.py
 from rest_framework import serializers
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from django.contrib.auth.models import User
 from .models import Course, Question, TestSession, GroupTest, Material
+import datetime
 import uuid
 from django.conf import settings
 
@@ -13,8 +15,8 @@ class MaterialSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Material
-        fields = ['id', 'name', 'tags', 'file', 'file_url', 'course', 'course_name', 'uploaded_by', 'uploaded_at']
-        read_only_fields = ['uploaded_by', 'uploaded_at', 'file_url', 'course_name']
+        fields = ['id', 'name', 'tags', 'file', 'file_url', 'course', 'course_name', 'status', 'uploaded_by', 'uploaded_at']
+        read_only_fields = ['uploaded_by', 'uploaded_at', 'file_url', 'course_name', 'status']
 
     def get_file_url(self, obj):
         """Return the stored Cloudinary URL"""
@@ -22,6 +24,8 @@ class MaterialSerializer(serializers.ModelSerializer):
 
 
 class GroupTestSerializer(serializers.ModelSerializer):
+    invitees = serializers.SlugRelatedField(many=True, read_only=True, slug_field='email', source='invites')
+
     class Meta:
         model = GroupTest
         fields = [
@@ -77,6 +81,16 @@ class BulkQuestionSerializer(serializers.Serializer):
         return value
 
 
+class CreateGroupTestSerializer(serializers.Serializer):
+    name = serializers.CharField(max_length=255)
+    course = serializers.PrimaryKeyRelatedField(queryset=Course.objects.all())
+    question_count = serializers.IntegerField(min_value=1)
+    duration_minutes = serializers.IntegerField(min_value=1)
+    invitees = serializers.ListField(child=serializers.EmailField())
+    # Naive datetimes from the client are taken to be UTC
+    scheduled_start = serializers.DateTimeField(default_timezone=datetime.timezone.utc)
+
+
 class QuestionStatusSerializer(serializers.ModelSerializer):
     class Meta:
         model = Question
@@ -139,62 +153,23 @@ class CurrentUserSerializer(serializers.Serializer):
     profile = UserProfileSerializer(read_only=True)
 
 
-class LecturerRegistrationSerializer(serializers.Serializer):
-    username = serializers.CharField(max_length=150)
-    email = serializers.EmailField()
-    password = serializers.CharField(write_only=True, min_length=8)
-    name = serializers.CharField(max_length=255)
-    department = serializers.CharField(max_length=255)
-    faculty = serializers.CharField(max_length=255)
-    phone = serializers.CharField(max_length=20)
-    
-    def validate_username(self, value):
-        """Check if username already exists"""
-        if User.objects.filter(username=value).exists():
-            raise serializers.ValidationError("Username already exists.")
-        return value
-    
-    def validate_email(self, value):
-        """Check if email already exists"""
-        if User.objects.filter(email=value).exists():
-            raise serializers.ValidationError("Email already registered.")
-        return value
-    
-    def create(self, validated_data):
-        from django.contrib.auth.models import User
-        from django.db import IntegrityError, ProgrammingError
-        import logging
-        
-        logger = logging.getLogger(__name__)
-        
-        try:
-            username = validated_data['username']
-            email = validated_data['email']
-            password = validated_data['password']
-            
-            user = User.objects.create_user(
-                username=username,
-                email=email,
-                password=password
-            )
-            
-            # Note: LecturerAccount is created in lecturer_dashboard app
-            # This serializer now only creates the User object
-            # The lecturer profile is created via /api/lecturer/register/
-            
-            return user
-        except IntegrityError as e:
-            logger.error(f"IntegrityError during lecturer registration: {str(e)}")
-            if 'username' in str(e).lower():
-                raise serializers.ValidationError({"username": "Username already exists."})
-            elif 'email' in str(e).lower():
-                raise serializers.ValidationError({"email": "Email already registered."})
-            else:
-                raise serializers.ValidationError({"detail": "Registration failed. Please try again."})
-        except Exception as e:
-            logger.error(f"Error during lecturer registration: {str(e)}", exc_info=True)
-            raise serializers.ValidationError({"detail": str(e)})
+class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """Token pair plus the basic user info and role, so clients don't need
+    a follow-up /api/auth/me/ request after logging in."""
+
+    def validate(self, attrs):
+        data = super().validate(attrs)
+        user = self.user
+        data['user'] = {
+            'id': user.id,
+            'username': user.username,
+            'email': user.email,
+        }
+        data['role'] = 'lecturer' if hasattr(user, 'lecturer_account') else 'student'
+        return data
+
 
 # Backwards-compatible aliases expected by other modules
 LecturerQuestionSerializer = QuestionSerializer
+SpecialQuestionSerializer = QuestionSerializer
 
@@ -1,24 +1,55 @@
 # exams/storage_backends.py
 import os
 import json
+import hashlib
+import time
+import random
 import logging
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from django.conf import settings
 from django.core.exceptions import ImproperlyConfigured
 from django.core.files.storage import Storage
 from django.utils.deconstruct import deconstructible
-from google.cloud import storage
-from google.oauth2 import service_account
 from google.api_core.exceptions import NotFound, Forbidden, ServiceUnavailable
-from google.auth.exceptions import RefreshError
+from google.auth.exceptions import RefreshError, TransportError
 
 logger = logging.getLogger(__name__)
 
+# Shared keep-alive session used for OAuth token refreshes so each refresh
+# reuses a pooled TLS connection to oauth2.googleapis.com instead of opening
+# a new one. Retries are handled by the callers, not by urllib3.
+_HTTP_SESSION = requests.Session()
+_HTTP_SESSION.mount(
+    'https://',
+    HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=Retry(total=0))
+)
+
+# Retry policy for transient GCS failures: full-jitter exponential backoff,
+# each sleep capped at 10s, and the whole attempt bounded by a wall budget.
+UPLOAD_MAX_RETRIES = 5
+UPLOAD_RETRY_BUDGET = 25  # seconds
+
+# Files below this size go up in a single multipart request; larger ones use
+# a resumable session with 8MiB chunks (a multiple of GCS's 256KiB unit).
+SINGLE_REQUEST_UPLOAD_MAX = 5 * 1024 * 1024
+RESUMABLE_CHUNK_SIZE = 8 * 1024 * 1024
+
+# Parsed credentials keyed by sha256 of the raw setting value, so a storage
+# instance (and forked workers, when loaded before fork) only parse once.
+_CRED_CACHE = {}
+
 @deconstructible
 class GoogleCloudMediaStorage(Storage):
+    # Client and bucket handle are shared by every instance in the process;
+    # constructing the storage performs no network calls.
+    _client = None
+    _bucket = None
+    _url_prefix = None
+
     def __init__(self):
         self.creds_value = getattr(settings, 'GOOGLE_APPLICATION_CREDENTIALS', None)
-        self._client = None
-        self._bucket = None
         
         if not self.creds_value:
             raise ImproperlyConfigured(
@@ -28,37 +59,64 @@ class GoogleCloudMediaStorage(Storage):
     @property
     def client(self):
         if self._client is None:
-            self._client = storage.Client(credentials=self._get_credentials())
+            # Imported lazily so processes that never touch GCS skip the
+            # google-cloud-storage import cost at startup.
+            from google.cloud import storage
+            from google.auth.transport.requests import AuthorizedSession, Request as GoogleAuthRequest
+
+            credentials = self._get_credentials()
+            authed_session = AuthorizedSession(
+                credentials,
+                auth_request=GoogleAuthRequest(session=_HTTP_SESSION),
+            )
+            GoogleCloudMediaStorage._client = storage.Client(
+                credentials=credentials, _http=authed_session
+            )
         return self._client
 
     @property
     def bucket(self):
         if self._bucket is None:
             bucket_name = getattr(settings, 'GS_BUCKET_NAME', 'petrox-materials')
-            self._bucket = self.client.bucket(bucket_name)
+            bucket = self.client.bucket(bucket_name)
+            # Existence is static for a deployment; only probe it on request.
+            # Otherwise a missing bucket surfaces as NotFound on first _save.
+            if os.environ.get('GCS_VERIFY_BUCKET') == '1' and not bucket.exists():
+                raise ImproperlyConfigured(f"GCS bucket '{bucket_name}' does not exist")
+            GoogleCloudMediaStorage._bucket = bucket
         return self._bucket
 
     def _get_credentials(self):
+        from google.oauth2 import service_account
+
+        digest = hashlib.sha256(self.creds_value.encode()).hexdigest()
+        cached = _CRED_CACHE.get(digest)
+        if cached is not None:
+            return cached
         try:
             # Try parsing as JSON credentials
             creds_json = json.loads(self.creds_value)
-            return service_account.Credentials.from_service_account_info(creds_json)
+            return _CRED_CACHE.setdefault(
+                digest, service_account.Credentials.from_service_account_info(creds_json)
+            )
         except json.JSONDecodeError:
-            # Fall back to file path
-            if os.path.exists(self.creds_value):
-                return service_account.Credentials.from_service_account_file(self.creds_value)
+            pass
+        except ValueError as e:
+            # Structural problems (missing keys, bad PEM) come from google-auth
+            raise ImproperlyConfigured(f"Invalid GCS service account JSON: {e}") from e
+
+        # Fall back to file path; let the loader report a missing file
+        try:
+            return service_account.Credentials.from_service_account_file(self.creds_value)
+        except FileNotFoundError as e:
             raise ImproperlyConfigured(
                 f"GCS credentials not found at: {self.creds_value} and not valid JSON"
-            )
+            ) from e
 
     def _save(self, name, content):
         try:
             blob = self.bucket.blob(name)
-            blob.upload_from_file(
-                content,
-                content_type=content.content_type,
-                timeout=300
-            )
+            self._upload_with_retry(blob, content)
             return name
         except Forbidden as e:
             logger.error(f"GCS Permission error: {str(e)}")
@@ -76,6 +134,36 @@ class GoogleCloudMediaStorage(Storage):
             logger.error(f"GCS upload error: {str(e)}")
             raise RuntimeError(f"File upload failed: {str(e)}") from e
 
+    def _upload_with_retry(self, blob, content, max_retries=UPLOAD_MAX_RETRIES):
+        size = getattr(content, 'size', None)
+        if size is not None and size < SINGLE_REQUEST_UPLOAD_MAX:
+            # A known size under the multipart limit avoids the extra round
+            # trip needed to open a resumable session.
+            upload_kwargs = {'size': size}
+        else:
+            blob.chunk_size = RESUMABLE_CHUNK_SIZE
+            upload_kwargs = {}
+
+        deadline = time.monotonic() + UPLOAD_RETRY_BUDGET
+        for attempt in range(max_retries):
+            try:
+                return blob.upload_from_file(
+                    content,
+                    content_type=content.content_type,
+                    rewind=attempt > 0,
+                    timeout=300,
+                    **upload_kwargs
+                )
+            except (ServiceUnavailable, TransportError) as e:
+                wait_time = random.uniform(0, min(2 ** attempt, 10))
+                if attempt == max_retries - 1 or time.monotonic() + wait_time > deadline:
+                    raise
+                logger.warning(
+                    "GCS upload attempt %d failed (%s), retrying in %.2fs",
+                    attempt + 1, e, wait_time
+                )
+                time.sleep(wait_time)
+
     def exists(self, name):
         try:
             blob = self.bucket.blob(name)
@@ -84,4 +172,11 @@ class GoogleCloudMediaStorage(Storage):
             return False
 
     def url(self, name):
-        return f"https://storage.googleapis.com/{self.bucket.name}/{name}"
+        # Public URLs only need the bucket name, so don't build a client here
+        prefix = GoogleCloudMediaStorage._url_prefix
+        if prefix is None:
+            bucket_name = getattr(settings, 'GS_BUCKET_NAME', 'petrox-materials')
+            prefix = GoogleCloudMediaStorage._url_prefix = (
+                f"https://storage.googleapis.com/{bucket_name}/"
+            )
+        return prefix + name
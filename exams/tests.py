@@ -1,3 +1,658 @@
-from django.test import TestCase
+import base64
+import importlib
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.apps import apps as django_apps
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.cache import cache
+from django.db import connection
+from django.db.migrations.loader import MigrationLoader
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from lecturer_dashboard.models import LecturerAccount
+
+from .models import (
+    Course, GroupTestInvite, Material, SpecialAnswer, SpecialChoice, SpecialCourse, SpecialEnrollment, SpecialQuestion,
+    UserProfile,
+)
+from . import tasks
+from .tasks import finalize_due_enrollments
+from .views.examFeatures import _decode_enrollment_cursor, _encode_enrollment_cursor
+
+
+def make_special_course(title='Course', started=True, **kwargs):
+    """A SpecialCourse that is running now (or starts in an hour)."""
+    start = timezone.now() + (timedelta(hours=-1) if started else timedelta(hours=1))
+    return SpecialCourse.objects.create(
+        title=title, start_time=start, end_time=start + timedelta(hours=3), **kwargs
+    )
+
+
+def add_question(course, mark=1, choices=4, correct=0):
+    """A question with `choices` options, the `correct`-th one right."""
+    question = SpecialQuestion.objects.create(course=course, text='Question', mark=mark)
+    SpecialChoice.objects.bulk_create(
+        SpecialChoice(question=question, text=f'Option {i}', is_correct=(i == correct))
+        for i in range(choices)
+    )
+    return question
+
+
+def make_lecturer(username='lecturer'):
+    user = User.objects.create_user(username, password='pw')
+    LecturerAccount.objects.create(
+        user=user, name='Dr Lecturer', department='Petroleum', faculty='Engineering', phone='000'
+    )
+    # Loaded the way CachedJWTAuthentication loads request.user
+    return User.objects.select_related('profile', 'lecturer_account').get(pk=user.pk)
+
+
+def enroll_students(course, count, start=0):
+    for i in range(start, start + count):
+        student = User.objects.create_user(f'student{i}', password='pw')
+        UserProfile.objects.create(user=student, registration_number=f'REG{i}', department='Petroleum')
+        SpecialEnrollment.objects.create(user=student, course=course, submitted=True, score=50)
+
+
+class SpecialCourseListQueryTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('student', password='pw')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = reverse('special-courses-list')
+
+    def test_query_count_does_not_grow_with_courses(self):
+        for i in range(2):
+            make_special_course(title=f'Course {i}')
+        # count + page
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url)
+        self.assertEqual(response.data['count'], 2)
+
+        for i in range(2, 15):
+            make_special_course(title=f'Course {i}')
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url)
+        self.assertEqual(response.data['count'], 15)
+
+
+class EnrollmentDetailQueryTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('student', password='pw')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.course = make_special_course()
+        self.enrollment = SpecialEnrollment.objects.create(user=self.user, course=self.course)
+        self.url = reverse('enrollment-detail', args=[self.enrollment.id])
+
+    def test_query_count_does_not_grow_with_questions(self):
+        add_question(self.course)
+        # enrollment + course, questions, choices
+        with self.assertNumQueries(3):
+            response = self.client.get(self.url)
+        self.assertEqual(len(response.data['questions']), 1)
+
+        for _ in range(12):
+            add_question(self.course)
+        with self.assertNumQueries(3):
+            response = self.client.get(self.url)
+        self.assertEqual(len(response.data['questions']), 13)
+        self.assertEqual(len(response.data['questions'][0]['choices']), 4)
+
+    def test_choices_do_not_reveal_the_answer(self):
+        add_question(self.course)
+        response = self.client.get(self.url)
+        self.assertNotIn('is_correct', response.data['questions'][0]['choices'][0])
+
+    def test_questions_hidden_before_the_course_starts(self):
+        course = make_special_course(started=False)
+        enrollment = SpecialEnrollment.objects.create(user=self.user, course=course)
+        add_question(course)
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('enrollment-detail', args=[enrollment.id]))
+        self.assertNotIn('questions', response.data)
+
+
+class LecturerViewSetQueryTests(TestCase):
+    def setUp(self):
+        self.lecturer = make_lecturer()
+        self.client = APIClient()
+        self.client.force_authenticate(self.lecturer)
+        self.course = make_special_course(created_by=self.lecturer)
+
+    def test_enrollment_list_query_count_does_not_grow(self):
+        url = reverse('lecturer-enrollment-list')
+        enroll_students(self.course, 2)
+        # count + page
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+        self.assertEqual(response.data['count'], 2)
+
+        enroll_students(self.course, 12, start=2)
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+        self.assertEqual(response.data['count'], 14)
+
+    def test_enrollment_list_only_shows_own_courses(self):
+        other = make_special_course(created_by=make_lecturer('other'))
+        enroll_students(self.course, 1)
+        enroll_students(other, 1, start=1)
+        response = self.client.get(reverse('lecturer-enrollment-list'))
+        self.assertEqual([e['course'] for e in response.data['results']], [self.course.id])
+
+    def test_question_list_query_count_does_not_grow(self):
+        url = reverse('lecturer-question-list')
+        add_question(self.course)
+        # count + page + choices
+        with self.assertNumQueries(3):
+            response = self.client.get(url)
+        self.assertEqual(response.data['count'], 1)
+
+        for _ in range(12):
+            add_question(self.course)
+        with self.assertNumQueries(3):
+            response = self.client.get(url)
+        self.assertEqual(response.data['count'], 13)
+        self.assertEqual(len(response.data['results'][0]['choices']), 4)
+
+    def test_course_enrollments_query_count_does_not_grow(self):
+        url = reverse('lecturer-enrollment-course-enrollments')
+        add_question(self.course, mark=2)
+        enroll_students(self.course, 2)
+        # course, enrollments with user and profile, total marks
+        with self.assertNumQueries(3):
+            response = self.client.get(url, {'course_id': self.course.id})
+        self.assertEqual(len(response.data['enrollments']), 2)
+
+        enroll_students(self.course, 12, start=2)
+        with self.assertNumQueries(3):
+            response = self.client.get(url, {'course_id': self.course.id})
+        self.assertEqual(len(response.data['enrollments']), 14)
+        self.assertEqual(response.data['enrollments'][0]['user']['profile']['department'], 'Petroleum')
+
+
+class IsLecturerTests(TestCase):
+    def setUp(self):
+        self.url = reverse('lecturer-enrollment-list')
+        self.lecturer = make_lecturer()
+
+    def get_as(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client.get(self.url)
+
+    def test_preloaded_account_costs_no_query(self):
+        # Just the (empty) count; nothing for the permission check
+        with self.assertNumQueries(1):
+            response = self.get_as(self.lecturer)
+        self.assertEqual(response.status_code, 200)
+
+    def test_account_changes_apply_to_the_next_request(self):
+        # A user loaded without the relation (session auth) is looked up per request
+        user = User.objects.create_user('session', password='pw')
+        self.assertEqual(self.get_as(User.objects.get(pk=user.pk)).status_code, 403)
+
+        LecturerAccount.objects.create(
+            user=user, name='Dr Session', department='Petroleum', faculty='Engineering', phone='000'
+        )
+        self.assertEqual(self.get_as(User.objects.get(pk=user.pk)).status_code, 200)
+
+        LecturerAccount.objects.filter(user=user).delete()
+        self.assertEqual(self.get_as(User.objects.get(pk=user.pk)).status_code, 403)
+
+
+class MaterialSearchTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('student', password='pw')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = reverse('material-search')
+        self.course = Course.objects.create(name='Reservoir Engineering')
+        self.other_course = Course.objects.create(name='Organic Chemistry')
+
+    def add_materials(self, count, start=0, course=None, name='Lecture notes'):
+        for i in range(start, start + count):
+            Material.objects.create(
+                course=course or self.course,
+                name=f'{name} {i}',
+                tags='week',
+                file=f'https://res.cloudinary.com/demo/raw/upload/v1/materials/{i}.pdf',
+                uploaded_by=self.user,
+            )
+
+    def search(self, query):
+        return {m['name'] for m in self.client.get(self.url, {'query': query}).data['results']}
+
+    def test_query_count_does_not_grow_with_results(self):
+        self.add_materials(2)
+        # count + page, course joined in
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url, {'query': 'notes'})
+        self.assertEqual(response.data['count'], 2)
+
+        self.add_materials(12, start=2)
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url, {'query': 'notes'})
+        self.assertEqual(response.data['count'], 14)
+        self.assertEqual(response.data['results'][0]['course_name'], 'Reservoir Engineering')
+
+    def test_matches_words_substrings_and_course_names(self):
+        self.add_materials(1, name='Lecture notes')
+        self.add_materials(1, start=1, course=self.other_course, name='Past questions')
+        # full-text (stemmed)
+        self.assertEqual(self.search('note'), {'Lecture notes 0'})
+        # substring of the name
+        self.assertEqual(self.search('ectur'), {'Lecture notes 0'})
+        # course name, whole word and substring
+        self.assertEqual(self.search('chemistry'), {'Past questions 1'})
+        self.assertEqual(self.search('rganic'), {'Past questions 1'})
+        self.assertEqual(self.search('geology'), set())
+
+
+class SubmitExamTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('student', password='pw')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.course = make_special_course()
+        self.enrollment = SpecialEnrollment.objects.create(user=self.user, course=self.course, started=True)
+        self.url = reverse('submit-exam', args=[self.enrollment.id])
+        self.q1 = add_question(self.course, mark=2)
+        self.q2 = add_question(self.course, mark=3)
+
+    def right(self, question):
+        return question.choices.get(is_correct=True).id
+
+    def wrong(self, question):
+        return question.choices.filter(is_correct=False).first().id
+
+    def submit(self, *answers):
+        return self.client.post(
+            self.url,
+            {'answers': [{'question': q, 'choice': c} for q, c in answers]},
+            format='json',
+        )
+
+    def test_score_is_a_percentage_of_all_marks(self):
+        response = self.submit((self.q1.id, self.right(self.q1)), (self.q2.id, self.wrong(self.q2)))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['score'], 40)
+        self.enrollment.refresh_from_db()
+        self.assertTrue(self.enrollment.submitted)
+        self.assertEqual(self.enrollment.score, 40)
+
+    def test_unanswered_questions_still_count_towards_the_total(self):
+        response = self.submit((self.q2.id, self.right(self.q2)))
+        self.assertEqual(response.data['score'], 60)
+
+    def test_existing_answers_are_overwritten(self):
+        stale = timezone.now() - timedelta(hours=1)
+        SpecialAnswer.objects.create(enrollment=self.enrollment, question=self.q1, choice_id=self.wrong(self.q1))
+        SpecialAnswer.objects.filter(enrollment=self.enrollment).update(answered_at=stale)
+
+        response = self.submit((self.q1.id, self.right(self.q1)))
+        self.assertEqual(response.status_code, 200)
+        answer = SpecialAnswer.objects.get(enrollment=self.enrollment, question=self.q1)
+        self.assertEqual(answer.choice_id, self.right(self.q1))
+        self.assertGreater(answer.answered_at, stale)
+        self.assertEqual(SpecialAnswer.objects.filter(enrollment=self.enrollment).count(), 1)
+
+    def test_last_answer_for_a_question_wins(self):
+        response = self.submit((self.q1.id, self.wrong(self.q1)), (self.q1.id, self.right(self.q1)))
+        self.assertEqual(response.data['score'], 40)
+        self.assertEqual(
+            SpecialAnswer.objects.get(enrollment=self.enrollment, question=self.q1).choice_id,
+            self.right(self.q1),
+        )
+
+    def test_unknown_question_is_rejected(self):
+        other_question = add_question(make_special_course(title='Other'))
+        for question_id in (other_question.id, 999999):
+            response = self.submit((self.q1.id, self.right(self.q1)), (question_id, None))
+            self.assertEqual(response.status_code, 404)
+        self.assertFalse(SpecialAnswer.objects.exists())
+        self.enrollment.refresh_from_db()
+        self.assertFalse(self.enrollment.submitted)
+
+    def test_unknown_or_foreign_choice_scores_nothing(self):
+        response = self.submit((self.q1.id, 999999), (self.q2.id, self.right(self.q1)))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['score'], 0)
+        self.assertEqual(
+            set(SpecialAnswer.objects.filter(enrollment=self.enrollment).values_list('choice_id', flat=True)),
+            {None},
+        )
+
+    def test_second_submission_is_refused(self):
+        self.submit((self.q1.id, self.right(self.q1)))
+        response = self.submit((self.q2.id, self.right(self.q2)))
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(SpecialEnrollment.objects.get(pk=self.enrollment.pk).score, 40)
+
+
+def legacy_score(enrollment):
+    """The per-row scoring finalize_due_exams used before finalize_due_enrollments."""
+    total_possible = 0
+    total_score = 0
+    for q in enrollment.course.questions.all():
+        total_possible += q.mark
+        ans = enrollment.answers.filter(question=q).first()
+        if ans and ans.choice and ans.choice.is_correct:
+            total_score += q.mark
+    return (total_score / total_possible) * 100 if total_possible else 0
+
+
+class FinalizeDueEnrollmentsTests(TestCase):
+    def setUp(self):
+        ended = timezone.now() - timedelta(hours=5)
+        self.course = SpecialCourse.objects.create(
+            title='Ended', start_time=ended, end_time=ended + timedelta(hours=3)
+        )
+        self.questions = [add_question(self.course, mark=mark) for mark in (2, 3, 5)]
+        self.empty_course = SpecialCourse.objects.create(
+            title='No questions', start_time=ended, end_time=ended + timedelta(hours=3)
+        )
+        self.running_course = make_special_course(title='Running')
+        add_question(self.running_course)
+
+    def enroll(self, name, course, picks=(), **kwargs):
+        """Enroll a new user; picks holds a choice index (or None) per question."""
+        user = User.objects.create_user(name, password='pw')
+        enrollment = SpecialEnrollment.objects.create(user=user, course=course, **kwargs)
+        for question, pick in zip(course.questions.order_by('id'), picks):
+            choice = None if pick is None else question.choices.order_by('id')[pick]
+            SpecialAnswer.objects.create(enrollment=enrollment, question=question, choice=choice)
+        return enrollment
+
+    def test_matches_per_row_scoring(self):
+        due = [
+            self.enroll('all_right', self.course, picks=(0, 0, 0)),
+            self.enroll('partial', self.course, picks=(0, 1, 0)),
+            self.enroll('all_wrong', self.course, picks=(1, 2, 3)),
+            self.enroll('blank_choice', self.course, picks=(None, 0)),
+            self.enroll('no_answers', self.course),
+            self.enroll('no_questions', self.empty_course),
+        ]
+        submitted = self.enroll('submitted', self.course, picks=(1, 1, 1), submitted=True, score=12)
+        running = self.enroll('running', self.running_course, picks=(0,))
+        expected = {e.pk: legacy_score(e) for e in due}
+        self.assertEqual(list(expected.values()), [100, 70, 0, 30, 0, 0])
+
+        now = timezone.now()
+        self.assertEqual(finalize_due_enrollments(now=now), len(due))
+
+        for e in SpecialEnrollment.objects.filter(pk__in=expected):
+            self.assertEqual(e.score, expected[e.pk])
+            self.assertTrue(e.submitted)
+            self.assertEqual(e.submitted_at, now)
+        submitted.refresh_from_db()
+        self.assertEqual(submitted.score, 12)
+        self.assertIsNone(submitted.submitted_at)
+        running.refresh_from_db()
+        self.assertFalse(running.submitted)
+
+        self.assertEqual(finalize_due_enrollments(), 0)
+
+    def test_query_count_does_not_grow_with_enrollments(self):
+        self.enroll('first', self.course, picks=(0, 1, 0))
+        # SELECT, then SAVEPOINT, one batched UPDATE and RELEASE
+        with self.assertNumQueries(4):
+            finalize_due_enrollments()
+
+        for i in range(20):
+            self.enroll(f'student{i}', self.course, picks=(0, 0, i % 4))
+        with self.assertNumQueries(4):
+            finalize_due_enrollments()
+
+
+class EnrolledCoursesTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('student', password='pw')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = reverse('enrollments-list')
+        base = timezone.now() - timedelta(days=1)
+        self.enrollments = []
+        for i in range(5):
+            enrollment = SpecialEnrollment.objects.create(
+                user=self.user, course=make_special_course(title=f'Course {i}')
+            )
+            self.enrollments.append(enrollment)
+        # Two pairs share a timestamp so pages must tie-break on id
+        stamps = [base, base, base + timedelta(minutes=1), base + timedelta(minutes=2), base + timedelta(minutes=2)]
+        for enrollment, stamp in zip(self.enrollments, stamps):
+            SpecialEnrollment.objects.filter(pk=enrollment.pk).update(enrolled_at=stamp)
+        other = User.objects.create_user('other', password='pw')
+        SpecialEnrollment.objects.create(user=other, course=self.enrollments[0].course)
+        # Newest first, then highest id first among equal timestamps
+        self.expected_ids = [e.pk for e in reversed(self.enrollments)]
+
+    def test_cursor_round_trip(self):
+        enrollment = SpecialEnrollment.objects.get(pk=self.enrollments[0].pk)
+        self.assertEqual(
+            _decode_enrollment_cursor(_encode_enrollment_cursor(enrollment)),
+            (enrollment.enrolled_at, enrollment.pk),
+        )
+
+    def test_cursor_pages_walk_every_row_once(self):
+        seen = []
+        cursor = ''
+        while True:
+            response = self.client.get(self.url, {'cursor': cursor, 'page_size': 2})
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn('count', response.data)
+            seen.extend(row['id'] for row in response.data['results'])
+            if not response.data['has_more']:
+                self.assertIsNone(response.data['next_cursor'])
+                break
+            cursor = response.data['next_cursor']
+        self.assertEqual(seen, self.expected_ids)
+
+    def test_cursor_between_equal_timestamps(self):
+        # The cursor sits on the higher id of the tied pair; only the lower one follows
+        newest_tied = SpecialEnrollment.objects.get(pk=self.enrollments[4].pk)
+        response = self.client.get(self.url, {'cursor': _encode_enrollment_cursor(newest_tied)})
+        self.assertEqual([row['id'] for row in response.data['results']], self.expected_ids[1:])
+
+    def test_bad_cursor_is_rejected(self):
+        for cursor in ('not base64!', base64.urlsafe_b64encode(b'no-separator').decode(),
+                       base64.urlsafe_b64encode(b'yesterday|1').decode(),
+                       base64.urlsafe_b64encode(b'2024-01-01T00:00:00|x').decode()):
+            response = self.client.get(self.url, {'cursor': cursor})
+            self.assertEqual(response.status_code, 400, cursor)
+            self.assertEqual(response.data, {'detail': 'Invalid cursor.'})
+
+    def test_page_mode_counts_only_on_request(self):
+        response = self.client.get(self.url, {'page_size': 2})
+        self.assertIsNone(response.data['count'])
+        self.assertTrue(response.data['has_more'])
+        self.assertEqual([row['id'] for row in response.data['results']], self.expected_ids[:2])
+
+        response = self.client.get(self.url, {'page_size': 2, 'page': 3, 'include_total': '1'})
+        self.assertEqual(response.data['count'], 5)
+        self.assertFalse(response.data['has_more'])
+        self.assertEqual([row['id'] for row in response.data['results']], self.expected_ids[4:])
+
+    def test_query_count(self):
+        # count + page (the courses come in with the page via select_related)
+        with self.assertNumQueries(2):
+            self.client.get(self.url, {'include_total': '1'})
+        with self.assertNumQueries(1):
+            self.client.get(self.url)
+        with self.assertNumQueries(1):
+            self.client.get(self.url, {'cursor': ''})
+
+
+class GroupTestInviteMigrationTests(TestCase):
+    """The data step of 0016_grouptestinvite, run against the historical
+    GroupTest that still has the comma-separated invitees column."""
+
+    migration = importlib.import_module('exams.migrations.0016_grouptestinvite')
+
+    def setUp(self):
+        # The test database is built without migrations, so load the graph explicitly
+        with override_settings(MIGRATION_MODULES={}):
+            loader = MigrationLoader(None, ignore_no_migrations=True)
+        state = loader.project_state(('exams', '0015_alter_material_fields'))
+        # Everything in 0016 that precedes the RunPython step
+        for operation in self.migration.Migration.operations[:2]:
+            operation.state_forwards('exams', state)
+        self.apps = state.apps
+        self.GroupTest = self.apps.get_model('exams', 'GroupTest')
+        with connection.schema_editor() as editor:
+            editor.add_field(self.GroupTest, self.GroupTest._meta.get_field('invitees'))
+
+        self.creator = User.objects.create_user('creator', password='pw')
+        self.course = Course.objects.create(name='Drilling')
+
+    def make_group_test(self, invitees):
+        return self.GroupTest.objects.create(
+            name='Group', course_id=self.course.pk, created_by_id=self.creator.pk,
+            question_count=10, duration_minutes=30, scheduled_start=timezone.now(), invitees=invitees,
+        )
+
+    def test_copy_and_restore_invitees(self):
+        ada = User.objects.create_user('ada', email='ada@example.com', password='pw')
+        first = self.make_group_test(' ada@example.com, bob@example.com,,ada@example.com ')
+        second = self.make_group_test('bob@example.com')
+        empty = self.make_group_test('')
+
+        self.migration.copy_invitees(self.apps, None)
+        invites = self.apps.get_model('exams', 'GroupTestInvite').objects.order_by('id')
+        self.assertEqual(
+            list(invites.values_list('group_test_id', 'email', 'user_id')),
+            [
+                (first.pk, 'ada@example.com', ada.pk),
+                (first.pk, 'bob@example.com', None),
+                (second.pk, 'bob@example.com', None),
+            ],
+        )
+
+        self.GroupTest.objects.update(invitees='')
+        self.migration.restore_invitees(self.apps, None)
+        self.assertEqual(
+            dict(self.GroupTest.objects.values_list('pk', 'invitees')),
+            {first.pk: 'ada@example.com,bob@example.com', second.pk: 'bob@example.com', empty.pk: ''},
+        )
+
+    def test_duplicate_user_emails_link_the_oldest_account(self):
+        oldest = User.objects.create_user('old', email='shared@example.com', password='pw')
+        User.objects.create_user('new', email='shared@example.com', password='pw')
+        self.make_group_test('shared@example.com')
+
+        self.migration.copy_invitees(self.apps, None)
+        invite = self.apps.get_model('exams', 'GroupTestInvite').objects.get()
+        self.assertEqual(invite.user_id, oldest.pk)
+
+
+class CreateGroupTestTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('host', password='pw')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.course = Course.objects.create(name='Drilling')
+        self.payload = {
+            'name': 'Mock exam',
+            'course': self.course.pk,
+            'question_count': 5,
+            'duration_minutes': 30,
+            'invitees': ['ada@example.com', 'bob@example.com', 'ada@example.com'],
+            'scheduled_start': (timezone.now() + timedelta(days=1)).isoformat(),
+        }
+
+    def create(self):
+        return self.client.post(reverse('create-group-test'), self.payload, format='json')
+
+    def test_invitees_are_stored_as_invite_rows(self):
+        ada = User.objects.create_user('ada', email='ada@example.com', password='pw')
+        with mock.patch.object(tasks.send_group_test_invites, 'delay') as delay:
+            response = self.create()
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(
+            list(GroupTestInvite.objects.order_by('email').values_list('group_test_id', 'email', 'user_id')),
+            [(response.data['id'], 'ada@example.com', ada.pk), (response.data['id'], 'bob@example.com', None)],
+        )
+        delay.assert_called_once_with(response.data['id'], self.payload['invitees'], 'host')
+
+    def test_invites_sent_inline_when_the_queue_is_down(self):
+        with mock.patch.object(tasks.send_group_test_invites, 'delay', side_effect=ConnectionError), \
+                mock.patch.object(tasks, 'get_connection', wraps=tasks.get_connection) as get_connection:
+            response = self.create()
+        self.assertEqual(response.status_code, 201, response.data)
+        # One message per invitee, over a single connection
+        get_connection.assert_called_once()
+        self.assertEqual(
+            sorted(m.to for m in mail.outbox), [['ada@example.com'], ['bob@example.com']]
+        )
+        for message in mail.outbox:
+            self.assertEqual(message.alternatives[0][1], 'text/html')
+
+    def test_send_failure_is_logged_not_raised(self):
+        with mock.patch.object(tasks.send_group_test_invites, 'delay', side_effect=ConnectionError), \
+                mock.patch.object(tasks, 'get_connection', side_effect=OSError('smtp down')), \
+                self.assertLogs('exams.views.group_tests', 'ERROR'):
+            response = self.create()
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(mail.outbox, [])
+
+
+class MaterialPrivacyBackfillTests(TestCase):
+    def test_existing_materials_become_private(self):
+        migration = importlib.import_module('exams.migrations.0023_backfill_material_is_private')
+        user = User.objects.create_user('uploader', password='pw')
+        course = Course.objects.create(name='Drilling')
+        for i in range(3):
+            Material.objects.create(name=f'Notes {i}', course=course, uploaded_by=user)
+
+        migration.mark_existing_private(django_apps, None)
+        self.assertFalse(Material.objects.filter(is_private=False).exists())
+
+
+class CurrentUserProfileTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('student', password='pw')
+        UserProfile.objects.create(user=self.user, registration_number='REG1', department='Petroleum')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = reverse('current-user-role')
+
+    def test_patch_clears_the_shared_profile_entry(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.data['profile']['department'], 'Petroleum')
+        # Cached in the shared cache, where every worker can see (and drop) it
+        self.assertEqual(cache.get(f'profile:{self.user.pk}')['department'], 'Petroleum')
+
+        response = self.client.patch(self.url, {'department': 'Chemical'}, format='multipart')
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(cache.get(f'profile:{self.user.pk}'))
+        self.assertEqual(self.client.get(self.url).data['profile']['department'], 'Chemical')
+
+
+class RegisterUserTests(TestCase):
+    def setUp(self):
+        self.url = reverse('register-user')
+
+    def test_missing_fields_are_listed(self):
+        cases = [
+            ({'username': 'ada', 'password': 'pw'}, "Email is required."),
+            ({'email': 'ada@example.com'}, "Username and password are required."),
+            ({}, "Username, password and email are required."),
+        ]
+        for payload, detail in cases:
+            response = APIClient().post(self.url, payload, format='json')
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response.data['detail'], detail)
+
+    def test_duplicate_username(self):
+        User.objects.create_user('ada', password='pw')
+        response = APIClient().post(
+            self.url, {'username': 'ada', 'password': 'pw', 'email': 'ada@example.com'}, format='json'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['detail'], "Username already exists.")
@@ -7,7 +7,12 @@ from .views.lecturer import LecturerCourseViewSet, LecturerQuestionViewSet, Lect
 from .debug_views import debug_auth
 from .views.materials import (
     MaterialUploadView, 
+    MaterialUploadSignView,
+    MaterialUploadConfirmView,
+    MaterialBulkConfirmView,
     MaterialDownloadView, 
+    MaterialDownloadURLView,
+    MaterialStatusView,
     MaterialSearchView,
     MaterialListView
 )
@@ -34,15 +39,22 @@ router.register(r'lecturer/questions', LecturerQuestionViewSet, basename='lectur
 router.register(r'lecturer/enrollments', LecturerEnrollmentViewSet, basename='lecturer-enrollment')
 
 urlpatterns = [
-    path('', include(router.urls)),
-    # path('lecturer/profile/', LecturerProfileView.as_view(), name='lecturer-profile'),
-    path('users/', RegisterUserAPIView.as_view(), name='register-user'),
-    # path('lecturer/register/', LecturerRegisterAPIView.as_view(), name='lecturer-register'),
+    # Hot read endpoints first: URLResolver tries patterns in order
+    path('leaderboard/', LeaderboardAPIView.as_view(), name='leaderboard'),
+    path('user/rank/', user_rank, name='user-rank'),
     path('materials/', MaterialListView.as_view(), name='material-list'),
     path('materials/upload/', MaterialUploadView.as_view(), name='material-upload'),
+    path('materials/upload/sign/', MaterialUploadSignView.as_view(), name='material-upload-sign'),
+    path('materials/upload/confirm/', MaterialUploadConfirmView.as_view(), name='material-upload-confirm'),
+    path('materials/upload/confirm/bulk/', MaterialBulkConfirmView.as_view(), name='material-upload-confirm-bulk'),
     path('materials/download/<int:pk>/', MaterialDownloadView.as_view(), name='material-download'),
+    path('materials/<int:pk>/url/', MaterialDownloadURLView.as_view(), name='material-download-url'),
+    path('materials/<int:pk>/status/', MaterialStatusView.as_view(), name='material-status'),
     path('materials/search/', MaterialSearchView.as_view(), name='material-search'),
     path('courses/', CourseListAPIView.as_view(), name='course-list'),
+    # path('lecturer/profile/', LecturerProfileView.as_view(), name='lecturer-profile'),
+    path('users/', RegisterUserAPIView.as_view(), name='register-user'),
+    # path('lecturer/register/', LecturerRegisterAPIView.as_view(), name='lecturer-register'),
     path('admin/add-question/', AddQuestionAPIView.as_view(), name='add-question'),
     path('start-test/', StartTestAPIView.as_view(), name='start-test'),
     path('submit-test/<int:session_id>/', SubmitTestAPIView.as_view(), name='submit-test'),
@@ -50,8 +62,6 @@ urlpatterns = [
     path('test-session/<int:id>/', TestSessionDetailAPIView.as_view(), name='test-session-detail'),
     path('create-group-test/', CreateGroupTestAPIView.as_view(), name='create-group-test'),
     path('group-test/<int:pk>/', GroupTestDetailAPIView.as_view(), name='group-test-detail'),
-    path('leaderboard/', LeaderboardAPIView.as_view(), name='leaderboard'),
-    path('user/rank/', user_rank, name='user-rank'),
     path('upload-pass-questions/', UploadPassQuestionsView.as_view(), name='upload-pass-questions'),
     path('questions/pending/', QuestionApprovalView.as_view(), name='pending-questions'),
     path('questions/<int:question_id>/status/', QuestionApprovalView.as_view(), name='update-question-status'),
@@ -67,6 +77,8 @@ urlpatterns = [
     path('enrollment/<int:enrollment_id>/submit/', examFeatures.submit_exam, name='submit-exam'),
     path('admin/finalize/', examFeatures.finalize_due_exams, name='finalize-exams'),
     path('special-courses/<int:course_id>/export/', examFeatures.export_course_results, name='export-results'),
+    # Router last; its api-root and format-suffix patterns are rarely hit
+    path('', include(router.urls)),
 ]
 
 
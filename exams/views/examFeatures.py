@@ -4,19 +4,23 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.db.models import Prefetch, Q, Sum
 from ..models import SpecialCourse, SpecialEnrollment, SpecialQuestion, SpecialChoice, SpecialAnswer
+from ..tasks import finalize_due_enrollments
 from ..serializers import SpecialCourseSerializer, EnrollmentSerializer, SpecialQuestionSerializer, SubmitExamSerializer
 from django.db import transaction
-from django.http import HttpResponse
+from django.http import HttpResponse, Http404
 import io
+import base64
 import logging
 
 logger = logging.getLogger(__name__)
 
 try:
-    import pandas as pd
+    from openpyxl import Workbook
 except Exception:
-    pd = None
+    Workbook = None
 
 class SpecialCourseList(generics.ListAPIView):
     serializer_class = SpecialCourseSerializer
@@ -29,31 +33,79 @@ class SpecialCourseList(generics.ListAPIView):
             qs = qs.filter(title__icontains=q)
         return qs
 
+def _encode_enrollment_cursor(enrollment):
+    raw = f"{enrollment.enrolled_at.isoformat()}|{enrollment.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def _decode_enrollment_cursor(cursor):
+    """Return (enrolled_at, id) from a cursor; raises ValueError if malformed."""
+    raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+    ts, last_id = raw.rsplit('|', 1)
+    enrolled_at = parse_datetime(ts)
+    if enrolled_at is None:
+        raise ValueError('bad cursor timestamp')
+    return enrolled_at, int(last_id)
+
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
 def get_enrolled_courses(request):
-    enrollments = SpecialEnrollment.objects.filter(user=request.user).select_related('course').order_by('-enrolled_at')
+    """List the user's enrollments, newest first.
+
+    Passing `cursor` (empty for the first page) switches to keyset
+    pagination on (enrolled_at, id): the response carries `next_cursor` and
+    `has_more` instead of `count`/`page`, and deep pages cost no OFFSET scan.
+    In page mode `count` is only computed when `include_total=1` is passed;
+    otherwise it is null and `has_more` tells the client whether to go on.
+    """
+    enrollments = SpecialEnrollment.objects.filter(user=request.user).select_related('course').order_by('-enrolled_at', '-id')
     
-    page = int(request.query_params.get('page', 1))
     page_size = int(request.query_params.get('page_size', 10))
-    start = (page - 1) * page_size
-    end = start + page_size
-    
-    total_count = enrollments.count()
-    paginated_enrollments = enrollments[start:end]
-    
-    data = {
-        'count': total_count,
-        'page': page,
-        'page_size': page_size,
-        'results': []
-    }
+    cursor = request.query_params.get('cursor')
+
+    if cursor is not None:
+        if cursor:
+            try:
+                enrolled_at, last_id = _decode_enrollment_cursor(cursor)
+            except ValueError:
+                return Response({'detail': 'Invalid cursor.'}, status=status.HTTP_400_BAD_REQUEST)
+            enrollments = enrollments.filter(
+                Q(enrolled_at__lt=enrolled_at) | Q(enrolled_at=enrolled_at, id__lt=last_id)
+            )
+        # Fetch one extra row to learn whether another page exists
+        paginated_enrollments = list(enrollments[:page_size + 1])
+        has_more = len(paginated_enrollments) > page_size
+        paginated_enrollments = paginated_enrollments[:page_size]
+        data = {
+            'page_size': page_size,
+            'next_cursor': _encode_enrollment_cursor(paginated_enrollments[-1]) if has_more else None,
+            'has_more': has_more,
+            'results': []
+        }
+    else:
+        page = int(request.query_params.get('page', 1))
+        start = (page - 1) * page_size
+        end = start + page_size
+        
+        include_total = request.query_params.get('include_total') == '1'
+        total_count = enrollments.count() if include_total else None
+        paginated_enrollments = list(enrollments[start:end + 1])
+        has_more = len(paginated_enrollments) > page_size
+        paginated_enrollments = paginated_enrollments[:page_size]
+        
+        data = {
+            'count': total_count,
+            'page': page,
+            'page_size': page_size,
+            'has_more': has_more,
+            'results': []
+        }
     
-    for enrollment in paginated_enrollments:
-        course = enrollment.course
+    # Serialize the page's courses in one pass rather than one serializer per row
+    course_data = SpecialCourseSerializer([e.course for e in paginated_enrollments], many=True).data
+    for enrollment, course in zip(paginated_enrollments, course_data):
         data['results'].append({
             'id': enrollment.id,
-            'course': SpecialCourseSerializer(course).data,
+            'course': course,
             'enrolled_at': enrollment.enrolled_at,
             'started': enrollment.started,
             'submitted': enrollment.submitted,
@@ -73,7 +125,7 @@ def enroll_course(request, course_id):
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
 def enrollment_detail(request, enrollment_id):
-    e = get_object_or_404(SpecialEnrollment, id=enrollment_id, user=request.user)
+    e = get_object_or_404(SpecialEnrollment.objects.select_related('course'), id=enrollment_id, user=request.user)
     data = {
         'id': e.id,
         'course': SpecialCourseSerializer(e.course).data,
@@ -81,7 +133,11 @@ def enrollment_detail(request, enrollment_id):
         'submitted': e.submitted,
     }
     if e.course.has_started() and not e.submitted:
-        questions = SpecialQuestion.objects.filter(course=e.course).prefetch_related('choices')
+        questions = SpecialQuestion.objects.filter(course=e.course).only(
+            'id', 'text', 'mark', 'image'
+        ).prefetch_related(
+            Prefetch('choices', queryset=SpecialChoice.objects.only('id', 'text', 'question_id'))
+        )
         # Use SpecialQuestionSerializer (Student View - Hides is_correct)
         data['questions'] = SpecialQuestionSerializer(questions, many=True).data
     return Response(data)
@@ -116,20 +172,44 @@ def submit_exam(request, enrollment_id):
     serializer.is_valid(raise_exception=True)
     answers = serializer.validated_data['answers']
     
+    # Later answers for the same question win, as they did with update_or_create
+    selected = {a['question']: a.get('choice') for a in answers}
+    questions = {
+        q.id: q
+        for q in SpecialQuestion.objects.filter(id__in=selected, course_id=e.course_id).only('id', 'mark')
+    }
+    if len(questions) != len(selected):
+        raise Http404('No SpecialQuestion matches the given query.')
+    choices = {
+        c.id: c
+        for c in SpecialChoice.objects.filter(
+            id__in=[c for c in selected.values() if c], question_id__in=selected
+        ).only('id', 'question_id', 'is_correct')
+    }
+
+    # Score against every question in the course, not just the answered ones,
+    # so leaving questions out of the payload cannot inflate the result
+    total_possible = SpecialQuestion.objects.filter(course_id=e.course_id).aggregate(
+        total=Sum('mark')
+    )['total'] or 0
     total_score = 0
-    total_possible = 0
-    
-    for a in answers:
-        q = get_object_or_404(SpecialQuestion, id=a['question'])
-        selected_choice = None
-        if a.get('choice'):
-            selected_choice = SpecialChoice.objects.filter(id=a['choice'], question=q).first()
-        
-        SpecialAnswer.objects.update_or_create(enrollment=e, question=q, defaults={'choice': selected_choice})
-        
-        total_possible += q.mark
+    rows = []
+    for question_id, choice_id in selected.items():
+        q = questions[question_id]
+        selected_choice = choices.get(choice_id)
+        if selected_choice is not None and selected_choice.question_id != question_id:
+            selected_choice = None
+        rows.append(SpecialAnswer(enrollment=e, question=q, choice=selected_choice))
+
         if selected_choice and selected_choice.is_correct:
             total_score += q.mark
+
+    SpecialAnswer.objects.bulk_create(
+        rows,
+        update_conflicts=True,
+        unique_fields=['enrollment', 'question'],
+        update_fields=['choice', 'answered_at'],
+    )
             
     e.score = (total_score / total_possible) * 100 if total_possible else 0
     e.submitted = True
@@ -141,32 +221,15 @@ def submit_exam(request, enrollment_id):
 @api_view(['POST'])
 @permission_classes([permissions.IsAdminUser])
 def finalize_due_exams(request):
-    now = timezone.now()
-    finalized = []
-    due_courses = SpecialCourse.objects.filter(end_time__lt=now)
-    for c in due_courses:
-        enrollments = SpecialEnrollment.objects.filter(course=c, submitted=False)
-        for e in enrollments:
-            total_possible = 0
-            total_score = 0
-            for q in c.questions.all():
-                total_possible += q.mark
-                ans = e.answers.filter(question=q).first()
-                if ans and ans.choice and ans.choice.is_correct:
-                    total_score += q.mark
-            e.score = (total_score / total_possible) * 100 if total_possible else 0
-            e.submitted = True
-            e.submitted_at = now
-            e.save()
-            finalized.append(e.id)
-    return Response({'finalized_count': len(finalized)})
+    finalized_count = finalize_due_enrollments()
+    return Response({'finalized_count': finalized_count})
 
 @api_view(['GET'])
 @permission_classes([permissions.IsAdminUser])
 def export_course_results(request, course_id):
-    if pd is None:
-        logger.error("Pandas/openpyxl not installed on server.")
-        return Response({'detail': 'pandas/openpyxl not installed on server'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    if Workbook is None:
+        logger.error("openpyxl not installed on server.")
+        return Response({'detail': 'openpyxl not installed on server'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
     try:
         enrollments = SpecialEnrollment.objects.filter(course_id=course_id, submitted=True).select_related('user', 'user__profile')
@@ -180,10 +243,17 @@ def export_course_results(request, course_id):
                 'score': e.score,
             })
 
-        df = pd.DataFrame(rows).sort_values(['department', 'name'])
+        rows.sort(key=lambda r: (r['department'] or '', r['name']))
+
+        # Write-only workbooks stream rows to the file instead of keeping a
+        # cell object per value, and skip building a DataFrame first
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet('results')
+        ws.append(['name', 'registration_number', 'department', 'score'])
+        for r in rows:
+            ws.append([r['name'], r['registration_number'], r['department'], r['score']])
         buffer = io.BytesIO()
-        with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
-            df.to_excel(writer, index=False, sheet_name='results')
+        wb.save(buffer)
 
         buffer.seek(0)
         resp = HttpResponse(buffer.read(), content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
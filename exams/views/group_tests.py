@@ -4,57 +4,47 @@ from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
-from django.utils.dateparse import parse_datetime
-from django.core.mail import send_mail
-from django.conf import settings
-from django.template.loader import render_to_string
-from django.utils.html import strip_tags
-from ..models import Course, Question, TestSession, GroupTest, User
-import random
+from django.contrib.auth.models import User
+from django.db import transaction
+from ..models import Course, Question, TestSession, GroupTest, GroupTestInvite
+from ..serializers import CreateGroupTestSerializer
+from ..tasks import send_group_test_invites
+from .leaderboard import invalidate_leaderboard
+import logging
+
+logger = logging.getLogger(__name__)
 
 class CreateGroupTestAPIView(APIView):
     permission_classes = [IsAuthenticated]
 
     def post(self, request):
-        required_fields = [
-            'name', 'course', 'question_count',
-            'duration_minutes', 'invitees', 'scheduled_start'
-        ]
-        if not all(field in request.data for field in required_fields):
-            return Response(
-                {'error': 'Missing required fields. All fields are required.'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-
-        name = request.data['name']
-        course_id = request.data['course']
-        question_count = request.data['question_count']
-        duration_minutes = request.data['duration_minutes']
-        invitees_list = request.data['invitees']
-        raw_sched = request.data['scheduled_start']
-
-        dt = parse_datetime(raw_sched)
-        if dt is None:
+        serializer = CreateGroupTestSerializer(data=request.data)
+        if not serializer.is_valid():
             return Response(
-                {'error': 'Invalid scheduled_start format. Use ISO‐UTC string.'},
+                {'error': 'Missing or invalid fields.', 'fields': serializer.errors},
                 status=status.HTTP_400_BAD_REQUEST
             )
-
-        if timezone.is_naive(dt):
-            dt = timezone.make_aware(dt, timezone=timezone.utc)
-
-        scheduled_start = dt
+        data = serializer.validated_data
+        invitees_list = data['invitees']
 
         try:
-            group_test = GroupTest.objects.create(
-                name=name,
-                course_id=course_id,
-                question_count=question_count,
-                duration_minutes=duration_minutes,
-                created_by=request.user,
-                invitees=",".join(invitees_list),
-                scheduled_start=scheduled_start
-            )
+            with transaction.atomic():
+                group_test = GroupTest.objects.create(
+                    name=data['name'],
+                    course=data['course'],
+                    question_count=data['question_count'],
+                    duration_minutes=data['duration_minutes'],
+                    created_by=request.user,
+                    scheduled_start=data['scheduled_start']
+                )
+                emails = list(dict.fromkeys(invitees_list))
+                user_ids = dict(
+                    User.objects.filter(email__in=emails).order_by('-id').values_list('email', 'id')
+                )
+                GroupTestInvite.objects.bulk_create([
+                    GroupTestInvite(group_test=group_test, email=email, user_id=user_ids.get(email))
+                    for email in emails
+                ])
         except Exception as e:
             return Response(
                 {'error': f'Error creating group test: {str(e)}'},
@@ -63,31 +53,14 @@ class CreateGroupTestAPIView(APIView):
 
         if invitees_list:
             try:
-                subject = f"Invitation to Group Test: {group_test.name}"
-                context = {
-                    'test_name': group_test.name,
-                    'course': group_test.course.name,
-                    'inviter': request.user.username,
-                    'question_count': group_test.question_count,
-                    'duration': group_test.duration_minutes,
-                    'scheduled_start': group_test.scheduled_start,
-                    'domain': settings.FRONTEND_DOMAIN,
-                    'test_id': group_test.id
-                }
-
-                html_message = render_to_string('email/group_test_invite.html', context)
-                plain_message = strip_tags(html_message)
-
-                send_mail(
-                    subject,
-                    plain_message,
-                    settings.EMAIL_HOST_USER,
-                    invitees_list,
-                    html_message=html_message,
-                    fail_silently=False
-                )
+                send_group_test_invites.delay(group_test.id, invitees_list, request.user.username)
             except Exception as e:
-                print(f"Error sending emails: {e}")
+                # Queue unavailable: fall back to sending inline as before
+                logger.warning("Could not enqueue group test invites: %s", e)
+                try:
+                    send_group_test_invites(group_test.id, invitees_list, request.user.username)
+                except Exception:
+                    logger.exception("Error sending group test invites for %s", group_test.id)
 
         return Response({
             'id': group_test.id,
@@ -100,7 +73,7 @@ class GroupTestDetailAPIView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request, pk):
-        group_test = get_object_or_404(GroupTest, pk=pk)
+        group_test = get_object_or_404(GroupTest.objects.select_related('course'), pk=pk)
         now = timezone.now()
 
         data = {
@@ -116,21 +89,31 @@ class GroupTestDetailAPIView(APIView):
         }
 
         if now >= group_test.scheduled_start:
-            questions_qs = list(group_test.course.questions.filter(status='approved').all())
-            if len(questions_qs) < group_test.question_count:
+            # Sample in SQL (ORDER BY RANDOM() LIMIT n) so only the chosen
+            # rows are loaded, instead of every approved question
+            chosen = list(
+                group_test.course.questions.filter(status='approved').order_by('?').only(
+                    'id', 'question_text', 'option_a', 'option_b', 'option_c', 'option_d', 'correct_option'
+                )[:group_test.question_count]
+            )
+            if len(chosen) < group_test.question_count:
                 return Response(
                     {'error': 'Not enough questions in this course.'},
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
-            chosen = random.sample(questions_qs, group_test.question_count)
             session = TestSession.objects.create(
                 user=request.user,
                 course=group_test.course,
                 duration=group_test.duration_minutes * 60,
                 question_count=group_test.question_count
             )
-            session.questions.set(chosen)
+            # New session: a single INSERT into the through table
+            through_model = TestSession.questions.through
+            through_model.objects.bulk_create([
+                through_model(testsession_id=session.id, question_id=q.id) for q in chosen
+            ])
+            invalidate_leaderboard()
 
             q_list = []
             for q in chosen:
@@ -1,17 +0,0 @@
-from .auth import RegisterUserAPIView
-from .courses import CourseListAPIView
-from .materials import MaterialUploadView, MaterialDownloadView, MaterialSearchView
-from .questions import (
-    AddQuestionAPIView,
-    QuestionApprovalView,
-    PreviewPassQuestionsView,
-    UploadPassQuestionsView
-)
-from .sessions import (
-    StartTestAPIView,
-    SubmitTestAPIView,
-    TestHistoryAPIView,
-    TestSessionDetailAPIView
-)
-from .group_tests import CreateGroupTestAPIView, GroupTestDetailAPIView
-from .leaderboard import LeaderboardAPIView, user_rank, user_upload_stats
\ No newline at end of file
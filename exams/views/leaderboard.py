@@ -2,17 +2,39 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
-from django.db.models import FloatField, F, ExpressionWrapper, Sum
+from django.db.models import Count, FloatField, F, ExpressionWrapper, Sum
 from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
 from ..models import Question, TestSession
 
+# The top-10 payload only changes when a TestSession is created or scored;
+# sessions.py and group_tests.py delete this key at those points, the TTL
+# bounds any miss. The default cache is the shared Redis one (settings.CACHES),
+# so a delete on one worker is seen by every other worker.
+LEADERBOARD_CACHE_KEY = 'leaderboard:top10'
+LEADERBOARD_CACHE_TTL = 60
+
+
+def invalidate_leaderboard():
+    cache.delete(LEADERBOARD_CACHE_KEY)
+
+
 class LeaderboardAPIView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
+        data = cache.get(LEADERBOARD_CACHE_KEY)
+        if data is None:
+            data = self.compute_top10()
+            cache.set(LEADERBOARD_CACHE_KEY, data, LEADERBOARD_CACHE_TTL)
+        return Response(data)
+
+    def compute_top10(self):
         users = User.objects.annotate(
             total_score=Sum('testsession__score'),
-            total_questions=Sum('testsession__question_count')
+            total_questions=Sum('testsession__question_count'),
+            tests_taken=Count('testsession')
         ).filter(
             total_questions__isnull=False,
             total_questions__gt=0
@@ -27,10 +49,9 @@ class LeaderboardAPIView(APIView):
             'id': user.id,
             'username': user.username,
             'avg_score': user.avg_score,
-            'tests_taken': user.testsession_set.count()
+            'tests_taken': user.tests_taken
         } for user in users]
-
-        return Response(data)
+        return data
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
@@ -46,16 +67,26 @@ def user_rank(request):
             F('total_score') * 100.0 / F('total_questions'),
             output_field=FloatField()
         )
-    ).order_by('-avg_score', 'id')
-    
-    ranked_users = list(users.values_list('id', flat=True))
-    
-    try:
-        rank = ranked_users.index(request.user.id) + 1
-    except ValueError:
-        rank = None
-        
-    return Response({'rank': rank})
+    )
+
+    # Rank in the database and fetch only the caller's row instead of
+    # pulling every scoring user's id into Python. Ordering by id as well
+    # keeps ranks unique, matching the old list position.
+    inner_sql, params = users.order_by().values('id', 'avg_score').query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            SELECT rnk FROM (
+                SELECT id, RANK() OVER (ORDER BY avg_score DESC, id) AS rnk
+                FROM ({inner_sql}) AS scored
+            ) AS ranked
+            WHERE id = %s
+            """,
+            [*params, request.user.id],
+        )
+        row = cursor.fetchone()
+
+    return Response({'rank': row[0] if row else None})
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
@@ -5,9 +5,11 @@ Handles course management, question creation, and results export for lecturers
 import csv
 from datetime import datetime
 
-from django.http import HttpResponse
-from django.db.models import Count, Q, Avg, Sum
-from rest_framework import viewsets, status, permissions
+from django.db import transaction
+from django.http import StreamingHttpResponse
+from django.db.models import Count, Q, Avg, Sum, CharField, Func, Value
+from django.db.models.functions import Coalesce, Concat, NullIf, Trim
+from rest_framework import viewsets, status, permissions, exceptions
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
@@ -16,15 +18,24 @@ from rest_framework.views import APIView
 from ..models import SpecialCourse, SpecialQuestion, SpecialChoice, SpecialEnrollment, SpecialAnswer, UserProfile
 from ..serializers import SpecialCourseSerializer, LecturerQuestionSerializer, EnrollmentSerializer
 
-# IMPORT THE LECTURER ACCOUNT MODEL
-from lecturer_dashboard.models import LecturerAccount 
+
+class Echo:
+    """File-like object whose write() returns the value, for streaming csv rows."""
+    def write(self, value):
+        return value
 
 
 class IsLecturer(permissions.BasePermission):
     """Permission class to ensure user is a lecturer"""
     def has_permission(self, request, view):
-        # Check if the user exists in the LecturerAccount table
-        return LecturerAccount.objects.filter(user=request.user).exists()
+        # Memoized on the request; DRF may check permissions more than once
+        cached = getattr(request, '_is_lecturer', None)
+        if cached is None:
+            # JWT-authenticated users arrive with lecturer_account already
+            # loaded; otherwise this is one query and Django caches the result
+            cached = hasattr(request.user, 'lecturer_account')
+            request._is_lecturer = cached
+        return cached
 
 
 class LecturerCourseViewSet(viewsets.ModelViewSet):
@@ -48,23 +59,27 @@ class LecturerCourseViewSet(viewsets.ModelViewSet):
         """Ensure lecturer can only update their own courses"""
         course = self.get_object()
         if course.created_by != self.request.user:
-            raise permissions.PermissionDenied("You can only update your own courses.")
+            raise exceptions.PermissionDenied("You can only update your own courses.")
         serializer.save()
 
     @action(detail=True, methods=['get'])
     def statistics(self, request, pk=None):
         """Get analytics for a specific course"""
         course = self.get_object()
-        enrollments = SpecialEnrollment.objects.filter(course=course)
-        
-        total_students = enrollments.count()
-        submitted_count = enrollments.filter(submitted=True).count()
-        scores = enrollments.filter(submitted=True).values_list('score', flat=True)
+        # All counts and the average come back from one aggregate query
+        stats = SpecialEnrollment.objects.filter(course=course).aggregate(
+            total=Count('id'),
+            submitted=Count('id', filter=Q(submitted=True)),
+            avg=Avg('score', filter=Q(submitted=True)),
+            # Assuming 50% is passing score
+            passed=Count('id', filter=Q(submitted=True, score__gte=50)),
+        )
+        total_students = stats['total']
+        submitted_count = stats['submitted']
         
         if submitted_count > 0:
-            avg_score = sum(scores) / submitted_count
-            # Assuming 50% is passing score
-            passed = sum(1 for s in scores if s >= 50)
+            avg_score = stats['avg'] or 0
+            passed = stats['passed']
             failed = submitted_count - passed
             success_rate = (passed / submitted_count) * 100
             failure_rate = (failed / submitted_count) * 100
@@ -91,42 +106,46 @@ class LecturerCourseViewSet(viewsets.ModelViewSet):
         """Export course results to CSV, grouped by department"""
         course = self.get_object()
         
-        # Fetch submitted enrollments with related user and profile data
+        # Fetch rows already in CSV column order; Postgres resolves the name
+        # fallback, profile defaults and date formatting
         # Ordering by department first ensures grouping in the CSV
-        enrollments = SpecialEnrollment.objects.filter(
+        rows = SpecialEnrollment.objects.filter(
             course=course,
             submitted=True
-        ).select_related('user', 'user__profile').order_by('user__profile__department', 'user__last_name')
-
-        response = HttpResponse(content_type='text/csv')
+        ).annotate(
+            # Prefer Full Name over Username
+            full_name=Coalesce(
+                NullIf(Trim(Concat('user__first_name', Value(' '), 'user__last_name')), Value('')),
+                'user__username',
+            ),
+            # Profile columns come back NULL for users without a profile
+            reg_number=Coalesce('user__profile__registration_number', Value('N/A')),
+            department=Coalesce('user__profile__department', Value('N/A')),
+            # Formatted in the database (connection time zone is UTC)
+            submitted_str=Coalesce(
+                Func('submitted_at', Value('YYYY-MM-DD HH24:MI:SS'), function='TO_CHAR', output_field=CharField()),
+                Value(''),
+            ),
+        ).values_list(
+            'full_name', 'reg_number', 'department', 'user__email', 'score', 'submitted_str',
+        ).order_by('user__profile__department', 'user__last_name')
+
+        course_tail = (course.title,)
+        writer = csv.writer(Echo())
+
+        def stream():
+            # Updated Header
+            yield writer.writerow(['Full Name', 'Reg Number', 'Department', 'Email', 'Score', 'Submitted At', 'Course Title'])
+
+            # Rows are fetched in chunks so memory stays flat for large courses
+            for row in rows.iterator(chunk_size=2000):
+                yield writer.writerow(row + course_tail)
+
+        response = StreamingHttpResponse(stream(), content_type='text/csv')
         filename = f"course_{course.id}_results_{datetime.now().strftime('%Y%m%d')}.csv"
         response['Content-Disposition'] = f'attachment; filename="{filename}"'
-
-        writer = csv.writer(response)
-        
-        # Updated Header
-        writer.writerow(['Full Name', 'Reg Number', 'Department', 'Email', 'Score', 'Submitted At', 'Course Title'])
-        
-        # Write data rows
-        for enrollment in enrollments:
-            # Safely get profile data
-            profile = getattr(enrollment.user, 'profile', None)
-            reg_number = getattr(profile, 'registration_number', 'N/A') if profile else 'N/A'
-            department = getattr(profile, 'department', 'N/A') if profile else 'N/A'
-            
-            # Prefer Full Name over Username
-            full_name = enrollment.user.get_full_name() or enrollment.user.username
-
-            writer.writerow([
-                full_name,
-                reg_number,
-                department,
-                enrollment.user.email,
-                enrollment.score,
-                enrollment.submitted_at.strftime('%Y-%m-%d %H:%M:%S') if enrollment.submitted_at else '',
-                course.title
-            ])
-
+        # Stop nginx from buffering the whole stream before forwarding it
+        response['X-Accel-Buffering'] = 'no'
         return response
 
 
@@ -143,15 +162,14 @@ class LecturerQuestionViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         """Get questions for lecturer's courses only"""
         lecturer_courses = SpecialCourse.objects.filter(created_by=self.request.user)
-        return SpecialQuestion.objects.filter(course__in=lecturer_courses)
+        # The serializer nests every question's choices; fetch them in one query
+        return SpecialQuestion.objects.filter(course__in=lecturer_courses).prefetch_related('choices')
 
     def perform_create(self, serializer):
         """Create a question (course must belong to lecturer)"""
         course_id = self.request.data.get('course')
-        try:
-            course = SpecialCourse.objects.get(id=course_id, created_by=self.request.user)
-        except SpecialCourse.DoesNotExist:
-            raise permissions.PermissionDenied("You can only add questions to your own courses.")
+        if not SpecialCourse.objects.filter(id=course_id, created_by=self.request.user).exists():
+            raise exceptions.PermissionDenied("You can only add questions to your own courses.")
         
         serializer.save()
 
@@ -159,7 +177,7 @@ class LecturerQuestionViewSet(viewsets.ModelViewSet):
         """Update a question (must belong to lecturer's course)"""
         question = self.get_object()
         if question.course.created_by != self.request.user:
-            raise permissions.PermissionDenied("You can only update questions in your own courses.")
+            raise exceptions.PermissionDenied("You can only update questions in your own courses.")
         serializer.save()
 
     @action(detail=False, methods=['post'])
@@ -169,30 +187,55 @@ class LecturerQuestionViewSet(viewsets.ModelViewSet):
         course_id = request.data.get('course_id')
         
         try:
-            course = SpecialCourse.objects.get(id=course_id, created_by=request.user)
+            # Only the key is needed to attach the new questions
+            course = SpecialCourse.objects.only('id').get(id=course_id, created_by=request.user)
         except SpecialCourse.DoesNotExist:
             return Response(
                 {'error': 'Course not found or you do not have permission'},
                 status=status.HTTP_404_NOT_FOUND
             )
 
-        created_questions = []
-        for q_data in questions_data:
-            question = SpecialQuestion.objects.create(
-                course=course,
-                text=q_data.get('text'),
-                mark=q_data.get('mark', 1)
-            )
-            
-            # Create choices
-            for choice_data in q_data.get('choices', []):
-                SpecialChoice.objects.create(
-                    question=question,
-                    text=choice_data.get('text'),
-                    is_correct=choice_data.get('is_correct', False)
+        # One INSERT for the questions (ids come back on Postgres), then one
+        # batched INSERT for all of their choices, committed together. No
+        # savepoint: nothing here recovers from a partial failure
+        with transaction.atomic(savepoint=False):
+            questions = SpecialQuestion.objects.bulk_create([
+                SpecialQuestion(
+                    course=course,
+                    text=q_data.get('text'),
+                    mark=q_data.get('mark', 1)
                 )
-            
-            created_questions.append(LecturerQuestionSerializer(question).data)
+                for q_data in questions_data
+            ])
+
+            choices_by_question = []
+            for question, q_data in zip(questions, questions_data):
+                choices_by_question.append([
+                    SpecialChoice(
+                        question=question,
+                        text=choice_data.get('text'),
+                        is_correct=choice_data.get('is_correct', False)
+                    )
+                    for choice_data in q_data.get('choices', [])
+                ])
+            SpecialChoice.objects.bulk_create(
+                [choice for choices in choices_by_question for choice in choices],
+                batch_size=500
+            )
+
+        # Same shape as LecturerQuestionSerializer, built from the rows just
+        # inserted (bulk-created questions never carry an image)
+        created_questions = [
+            {
+                'id': question.id,
+                'text': question.text,
+                'choices': [{'id': choice.id, 'text': choice.text} for choice in choices],
+                'mark': question.mark,
+                'image': None,
+                'image_url': None,
+            }
+            for question, choices in zip(questions, choices_by_question)
+        ]
 
         return Response({
             'created': len(created_questions),
@@ -234,7 +277,17 @@ class LecturerEnrollmentViewSet(viewsets.ReadOnlyModelViewSet):
             )
 
         # Fetch enrollments with user profile data
-        enrollments = SpecialEnrollment.objects.filter(course=course).select_related('user', 'user__profile')
+        # Only the columns used below are selected; profile avatars and user
+        # password hashes never leave the database
+        enrollments = list(
+            SpecialEnrollment.objects.filter(course=course)
+            .select_related('user', 'user__profile')
+            .only(
+                'id', 'score', 'submitted', 'enrolled_at', 'started',
+                'user__username', 'user__email', 'user__first_name', 'user__last_name',
+                'user__profile__department', 'user__profile__registration_number',
+            )
+        )
         
         # Calculate Total Marks for the Course to calculate raw scores
         # Sum of all question marks in this course
@@ -264,13 +317,16 @@ class LecturerEnrollmentViewSet(viewsets.ReadOnlyModelViewSet):
                 }
             })
         
+        # Counts come from the rows already loaded rather than three COUNT queries
+        submitted_count = sum(1 for env in enrollments if env.submitted)
+
         return Response({
             'course': SpecialCourseSerializer(course).data,
             'enrollments': enrollment_data,
             'total_marks': total_marks,  # Send total marks so frontend can show "10/15"
-            'total': enrollments.count(),
-            'submitted': enrollments.filter(submitted=True).count(),
-            'pending': enrollments.filter(submitted=False).count(),
+            'total': len(enrollments),
+            'submitted': submitted_count,
+            'pending': len(enrollments) - submitted_count,
         })
 
 
@@ -1,45 +1,141 @@
 # exams/views/materials.py
+import functools
+import hashlib
 import logging
+import os
+import shutil
+import tempfile
+import time
+import uuid
 
 from django.conf import settings
-from django.db import DataError, IntegrityError, transaction
-from django.db.models import Q
+from django.contrib.postgres.expressions import ArraySubquery
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.core.cache import cache
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from django.db import DataError, IntegrityError, connection, transaction
+from django.db.models import F, Lookup, Q
+from django.http import HttpResponseRedirect
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
 from django.utils import timezone
-
-import cloudinary.uploader
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
+
+import cloudinary
+import cloudinary.api
+import cloudinary.utils
+import requests
+from cloudinary.exceptions import Error as CloudinaryError, NotFound as CloudinaryNotFound
+from redis.exceptions import RedisError
 from rest_framework import generics, status
 from rest_framework.exceptions import APIException, ValidationError
 from rest_framework.generics import RetrieveAPIView, ListAPIView, CreateAPIView
+from rest_framework.pagination import CursorPagination
 from rest_framework.permissions import IsAuthenticated
-from rest_framework.parsers import MultiPartParser, FormParser
+from rest_framework.parsers import JSONParser, MultiPartParser, FormParser
 from rest_framework.response import Response
+from rest_framework.views import APIView
 from rest_framework.generics import RetrieveAPIView
 
-from ..models import Material
+from ..models import MATERIAL_SEARCH_CONFIG, Course, Material, material_search_vector
 from ..serializers import MaterialSerializer
-from exams.cloudinary_utils import get_cloudinary_signed_or_public_url
+from ..tasks import upload_material_to_cloudinary
+from exams.cloudinary_utils import get_cloudinary_signed_or_public_url, upload_material_file
 
 logger = logging.getLogger(__name__)
 
+# Cloudinary folder that signed direct uploads are confined to
+DIRECT_UPLOAD_FOLDER = "materials"
+# How long an issued upload signature can still be confirmed (seconds)
+DIRECT_UPLOAD_TTL = 3600
+# Seconds to wait for the CDN when reading a direct upload's size
+DIRECT_UPLOAD_HEAD_TIMEOUT = 5
+# Most direct uploads one bulk confirm may carry (the Admin API lookup limit)
+BULK_CONFIRM_MAX = 100
+
+# Just what MaterialSerializer renders, course name included; leaves out the
+# search_vector document and content hash
+MATERIAL_LIST_FIELDS = (
+    'id', 'name', 'tags', 'file', 'status', 'uploaded_by_id', 'uploaded_at',
+    'course__id', 'course__name',
+)
+
+# Signed download URLs last an hour. Each is reused for one half-hour window,
+# so whatever a client is handed still has at least 30 minutes left
+DOWNLOAD_URL_CACHE_TTL = 1800
+
+
+def _download_window():
+    """Index of the current DOWNLOAD_URL_CACHE_TTL-long window."""
+    return int(time.time() // DOWNLOAD_URL_CACHE_TTL)
+
+
+@functools.lru_cache(maxsize=None)
+def _max_lengths(model_class):
+    """Map of field name -> max_length for the model's length-limited fields."""
+    return {
+        f.name: f.max_length
+        for f in model_class._meta.get_fields()
+        if getattr(f, "max_length", None)
+    }
+
 
 def _truncate_field_if_needed(model_class, field_name, value):
     """
     Helper to truncate a string value to the model field's max_length.
     Returns the possibly-truncated value and a boolean indicating whether truncation occurred.
     """
-    if value is None:
-        return value, False
+    max_len = _max_lengths(model_class).get(field_name)
+    if max_len and isinstance(value, str) and len(value) > max_len:
+        return value[:max_len], True
+    return value, False
 
-    try:
-        field = model_class._meta.get_field(field_name)
-        max_len = getattr(field, "max_length", None)
-        if max_len and isinstance(value, str) and len(value) > max_len:
-            return value[:max_len], True
-    except Exception:
-        # If anything goes wrong, just return the original value and don't truncate.
-        return value, False
 
-    return value, False
+def _release_db_connection():
+    """
+    Close this thread's database connection ahead of a slow network call so it
+    goes back to the server/pooler instead of sitting idle; the next query
+    reconnects. Skipped inside a transaction, which must keep its connection.
+    """
+    if not connection.in_atomic_block:
+        connection.close()
+
+
+def _hash_upload(uploaded_file):
+    """Return the SHA-256 hex digest of an uploaded file, read in 64 KiB chunks."""
+    digest = hashlib.sha256()
+    for chunk in uploaded_file.chunks(chunk_size=64 * 1024):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _spool_upload(uploaded_file):
+    """
+    Copy an uploaded file to a private temp directory that outlives the request.
+    The original file name is kept so Cloudinary's use_filename still applies.
+    Returns the path of the copy.
+    """
+    tmp_dir = tempfile.mkdtemp(prefix="material-", dir=getattr(settings, "MATERIAL_UPLOAD_TMP_DIR", None))
+    tmp_path = os.path.join(tmp_dir, os.path.basename(uploaded_file.name) or "upload")
+    with open(tmp_path, "wb") as out:
+        for chunk in uploaded_file.chunks():
+            out.write(chunk)
+    return tmp_path
+
+
+def _discard_spooled_upload(tmp_path):
+    shutil.rmtree(os.path.dirname(tmp_path), ignore_errors=True)
+
+
+class LargeChunkUploadHandler(TemporaryFileUploadHandler):
+    """
+    TemporaryFileUploadHandler that reads the request body in 1 MiB chunks.
+    Django's multipart parser reads in the smallest chunk_size among the
+    handlers (64 KiB by default); larger reads mean far fewer boundary scans
+    and write calls for multi-megabyte PDFs.
+    """
+    chunk_size = 1024 * 1024
 
 
 class MaterialUploadView(generics.CreateAPIView):
@@ -47,11 +143,30 @@ class MaterialUploadView(generics.CreateAPIView):
     Upload a material (multipart/form-data expected).
     File is uploaded to Cloudinary as a public 'raw' resource and the secure_url is saved
     in the Material.file URLField.
+
+    With MATERIAL_ASYNC_UPLOADS enabled the file is spooled to disk, the
+    Material is saved with status 'uploading' and the Cloudinary upload runs
+    on the RQ worker; the response is then 202 Accepted.
     """
     serializer_class = MaterialSerializer
     permission_classes = [IsAuthenticated]
     parser_classes = (MultiPartParser, FormParser)
 
+    def initialize_request(self, request, *args, **kwargs):
+        # Spool every upload to a temp file, not just those over
+        # FILE_UPLOAD_MAX_MEMORY_SIZE, so Cloudinary streams it from disk
+        request.upload_handlers = [LargeChunkUploadHandler(request)]
+        return super().initialize_request(request, *args, **kwargs)
+
+    def create(self, request, *args, **kwargs):
+        response = super().create(request, *args, **kwargs)
+        if getattr(self, "_upload_queued", False):
+            response.status_code = status.HTTP_202_ACCEPTED
+            response.data["status_url"] = request.build_absolute_uri(
+                reverse("material-status", args=[response.data["id"]])
+            )
+        return response
+
     def perform_create(self, serializer):
         request = self.request
 
@@ -65,30 +180,63 @@ class MaterialUploadView(generics.CreateAPIView):
         if uploaded_file.size > max_file_size_bytes:
             raise ValidationError({"file": f"File too large. Maximum allowed is {max_file_size_bytes} bytes."})
 
-        # Upload to Cloudinary (public raw)
+        fields = self._material_fields(serializer)
+
+        # Identical bytes are already on Cloudinary: point at that file
+        # instead of uploading another copy
+        fields["content_sha256"] = _hash_upload(uploaded_file)
+        existing_url = Material.objects.filter(
+            content_sha256=fields["content_sha256"], status="ready"
+        ).exclude(file="").values_list("file", flat=True).first()
+        if existing_url:
+            logger.info("Reusing stored file for duplicate upload %s", fields["content_sha256"])
+            self._save_material(serializer, fields, file=existing_url)
+            return
+
+        if getattr(settings, "MATERIAL_ASYNC_UPLOADS", False):
+            tmp_path = _spool_upload(uploaded_file)
+            try:
+                material = self._save_material(serializer, fields, file="", status="uploading")
+            except Exception:
+                _discard_spooled_upload(tmp_path)
+                raise
+            try:
+                upload_material_to_cloudinary.delay(material.id, tmp_path)
+            except RedisError as exc:
+                # Queue unavailable: upload inline rather than strand the row
+                logger.warning("Could not enqueue material upload: %s", exc)
+                upload_material_to_cloudinary(material.id, tmp_path)
+                material.refresh_from_db(fields=["file", "status"])
+                return
+            self._upload_queued = True
+            return
+
+        # Large uploads are spooled to disk by Django; hand Cloudinary the path
+        # so it reads the file itself instead of us passing the file object
+        if hasattr(uploaded_file, "temporary_file_path"):
+            upload_source = uploaded_file.temporary_file_path()
+        else:
+            upload_source = uploaded_file
+
+        # Upload to Cloudinary (public raw). The upload can take seconds;
+        # don't hold a database connection idle for all of it
+        _release_db_connection()
         try:
-            upload_result = cloudinary.uploader.upload(
-                uploaded_file,
-                resource_type="raw",   # raw to preserve PDFs/docs
-                folder="materials",
-                type="upload",         # ensure public (not authenticated/signed)
-                use_filename=True,
-                unique_filename=True,  # avoid collisions
-                timeout=120  # seconds - adjust if you need larger timeouts
-            )
-            logger.debug("Cloudinary upload result: %s", upload_result)
-        except Exception as exc:
+            file_url = upload_material_file(upload_source)
+        except (CloudinaryError, OSError, ValueError) as exc:
             logger.exception("Cloudinary upload failed")
             raise APIException(detail=f"Failed to upload file to storage: {str(exc)}")
 
-        file_url = upload_result.get("secure_url") or upload_result.get("url")
-        if not file_url:
-            logger.error("No URL returned from Cloudinary upload_result=%s", upload_result)
-            raise APIException(detail="Upload succeeded but no file URL was returned by storage provider.")
+        self._save_material(serializer, fields, file=file_url)
 
-        # Remove the file from validated_data as we'll use the URL instead
-        validated_data = serializer.validated_data.copy()
-        validated_data.pop('file', None)
+    def _material_fields(self, serializer):
+        """
+        Field overrides for serializer.save(). serializer.save() already merges
+        validated_data, so only the values that change are returned; the
+        uploaded file itself is replaced by the caller's file= URL.
+        """
+        validated_data = serializer.validated_data
+        fields = {}
 
         # Defensive truncation to match DB field lengths (avoids DataError)
         # Truncate 'name' and 'tags' if they exceed DB column lengths
@@ -96,22 +244,26 @@ class MaterialUploadView(generics.CreateAPIView):
             truncated_name, truncated = _truncate_field_if_needed(Material, "name", validated_data["name"])
             if truncated:
                 logger.warning("Truncated material name to fit DB column length.")
-                validated_data["name"] = truncated_name
+                fields["name"] = truncated_name
 
         if "tags" in validated_data:
             truncated_tags, truncated = _truncate_field_if_needed(Material, "tags", validated_data.get("tags"))
             if truncated:
                 logger.warning("Truncated material tags to fit DB column length.")
-                validated_data["tags"] = truncated_tags
+                fields["tags"] = truncated_tags
 
+        return fields
+
+    def _save_material(self, serializer, fields, **overrides):
         # Save in a transaction to get atomic behavior
         try:
             with transaction.atomic():
-                # serializer.save accepts overrides; pass file and uploaded_by explicitly
-                serializer.save(
-                    uploaded_by=request.user,
-                    file=file_url,
-                    **validated_data
+                # serializer.save merges these over validated_data; file and
+                # uploaded_by are always passed explicitly
+                return serializer.save(
+                    uploaded_by=self.request.user,
+                    **fields,
+                    **overrides
                 )
         except DataError as e:
             # Database-level data issues (e.g., string too long)
@@ -120,27 +272,279 @@ class MaterialUploadView(generics.CreateAPIView):
         except IntegrityError as e:
             logger.exception("Database IntegrityError while saving Material: %s", e)
             raise APIException(detail=f"Database integrity error: {str(e)}")
-        except Exception as e:
-            logger.exception("Unexpected error saving material: %s", e)
-            raise APIException(detail="Failed to save material")
+
+
+def _direct_upload_key(public_id):
+    return f"mat_upload:{public_id}"
+
+
+class MaterialUploadSignView(APIView):
+    """
+    POST /api/materials/upload/sign/  { "filename": "notes.pdf" }  (filename optional)
+    Returns signed parameters for uploading the file from the browser straight to
+    Cloudinary (POST multipart to upload_url with file, api_key, timestamp, folder,
+    public_id and signature), so the bytes never pass through this server.
+    Then POST the returned material_public_id, with version and signature from
+    Cloudinary's upload response, to /api/materials/upload/confirm/.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        config = cloudinary.config()
+        if not (config.api_secret and config.api_key and config.cloud_name):
+            raise APIException(detail="Direct uploads are not configured on this server")
+
+        # Raw resources keep their extension in the public_id; keep it so
+        # downloads open with the right application
+        ext = os.path.splitext(str(request.data.get("filename") or ""))[1].lower()
+        if not (ext[1:].isalnum() and len(ext) <= 10):
+            ext = ""
+
+        params = {
+            "folder": DIRECT_UPLOAD_FOLDER,
+            "public_id": f"{uuid.uuid4().hex}{ext}",
+            "timestamp": int(time.time()),
+        }
+        params["signature"] = cloudinary.utils.api_sign_request(params, config.api_secret)
+
+        # Only the user the signature was issued to may confirm this upload
+        material_public_id = f"{DIRECT_UPLOAD_FOLDER}/{params['public_id']}"
+        cache.set(_direct_upload_key(material_public_id), request.user.id, DIRECT_UPLOAD_TTL)
+
+        return Response({
+            **params,
+            "api_key": config.api_key,
+            "cloud_name": config.cloud_name,
+            "resource_type": "raw",
+            "upload_url": f"https://api.cloudinary.com/v1_1/{config.cloud_name}/raw/upload",
+            "material_public_id": material_public_id,
+            "max_file_size": int(getattr(settings, "MATERIAL_MAX_FILE_SIZE", 20 * 1024 * 1024)),
+        }, status=status.HTTP_200_OK)
+
+
+def _verified_upload_url(public_id, version, signature):
+    """
+    Delivery URL for a direct upload, built locally when the upload response
+    signature (public_id + version, signed with our API secret) checks out.
+    Returns None when the signature is missing or does not match.
+    """
+    if not (version and signature and cloudinary.config().api_secret):
+        return None
+    if not cloudinary.utils.verify_api_response_signature(public_id, version, signature):
+        return None
+    url, _ = cloudinary.utils.cloudinary_url(
+        public_id, resource_type="raw", type="upload", version=version, secure=True
+    )
+    return url
+
+
+def _delivered_size(url):
+    """
+    Size in bytes of a file as served by Cloudinary's CDN (HEAD request), or
+    None when the CDN doesn't answer with a Content-Length.
+    """
+    try:
+        # identity, so Content-Length is the stored size rather than a compressed one
+        response = requests.head(
+            url,
+            headers={"Accept-Encoding": "identity"},
+            allow_redirects=True,
+            timeout=DIRECT_UPLOAD_HEAD_TIMEOUT,
+        )
+    except requests.RequestException as exc:
+        logger.warning("HEAD %s failed: %s", url, exc)
+        return None
+    length = response.headers.get("Content-Length", "")
+    if response.status_code != 200 or not length.isdigit():
+        return None
+    return int(length)
+
+
+class MaterialUploadConfirmView(MaterialUploadView):
+    """
+    POST /api/materials/upload/confirm/
+    { "public_id": "<material_public_id from sign>", "name": ..., "tags": ..., "course": ...,
+      "version": ..., "signature": ... }
+    Creates the Material for a file the browser uploaded directly to Cloudinary.
+    version and signature are copied from Cloudinary's upload response; the
+    signature is checked locally, the URL rebuilt from public_id and version,
+    and the size read from the CDN. Without them (or when the CDN reports no
+    size) the resource is looked up through the Cloudinary Admin API.
+    """
+    parser_classes = (JSONParser, MultiPartParser, FormParser)
+
+    def perform_create(self, serializer):
+        data = self.request.data
+        public_id = str(data.get("public_id") or "")
+        cache_key = _direct_upload_key(public_id)
+        if cache.get(cache_key) != self.request.user.id:
+            raise ValidationError({"public_id": "Unknown or expired upload. Request a new signature."})
+
+        max_file_size_bytes = int(getattr(settings, "MATERIAL_MAX_FILE_SIZE", 20 * 1024 * 1024))
+
+        # Both lookups below go over the network
+        _release_db_connection()
+        file_url = _verified_upload_url(
+            public_id, str(data.get("version") or ""), str(data.get("signature") or "")
+        )
+        # The upload signature can't cap the file size, so never take the
+        # size from the client
+        size = _delivered_size(file_url) if file_url else None
+        if size is None:
+            try:
+                resource = cloudinary.api.resource(public_id, resource_type="raw")
+            except CloudinaryNotFound:
+                raise ValidationError({"public_id": "File has not been uploaded to storage yet."})
+            except CloudinaryError as exc:
+                logger.exception("Failed to look up direct upload %s", public_id)
+                raise APIException(detail=f"Failed to verify upload: {str(exc)}")
+            size = resource.get("bytes")
+            file_url = resource.get("secure_url") or resource.get("url")
+            if not file_url:
+                logger.error("No URL returned for direct upload resource=%s", resource)
+                raise APIException(detail="Upload succeeded but no file URL was returned by storage provider.")
+
+        if int(size or 0) > max_file_size_bytes:
+            raise ValidationError({"file": f"File too large. Maximum allowed is {max_file_size_bytes} bytes."})
+
+        self._save_material(serializer, self._material_fields(serializer), file=file_url)
+        # One Material per signature
+        cache.delete(cache_key)
+
+
+class MaterialBulkConfirmView(APIView):
+    """
+    POST /api/materials/upload/confirm/bulk/
+    { "items": [ { "public_id": ..., "name": ..., "tags": ..., "course": ... }, ... ] }
+    Confirms up to BULK_CONFIRM_MAX direct uploads at once: one Admin API lookup
+    for all of them and one INSERT. Either every item is created or none is.
+    """
+    permission_classes = [IsAuthenticated]
+    parser_classes = (JSONParser,)
+
+    def post(self, request):
+        items = request.data.get("items")
+        if not isinstance(items, list) or not items:
+            raise ValidationError({"items": "Provide a non-empty list of uploads to confirm."})
+        if len(items) > BULK_CONFIRM_MAX:
+            raise ValidationError({"items": f"At most {BULK_CONFIRM_MAX} uploads can be confirmed at once."})
+
+        serializer = MaterialSerializer(data=items, many=True)
+        serializer.is_valid(raise_exception=True)
+
+        public_ids = [str(item.get("public_id") or "") for item in items]
+        if len(set(public_ids)) != len(public_ids):
+            raise ValidationError({"items": "Each upload can only be confirmed once."})
+        cache_keys = [_direct_upload_key(public_id) for public_id in public_ids]
+        owners = cache.get_many(cache_keys)
+        unknown = [pid for pid, key in zip(public_ids, cache_keys) if owners.get(key) != request.user.id]
+        if unknown:
+            raise ValidationError({"public_id": f"Unknown or expired uploads: {', '.join(unknown)}"})
+
+        _release_db_connection()
+        try:
+            found = cloudinary.api.resources_by_ids(
+                public_ids, resource_type="raw", max_results=BULK_CONFIRM_MAX
+            ).get("resources", [])
+        except CloudinaryError as exc:
+            logger.exception("Failed to look up %s direct uploads", len(public_ids))
+            raise APIException(detail=f"Failed to verify uploads: {str(exc)}")
+        resources = {r.get("public_id"): r for r in found}
+
+        missing = [pid for pid in public_ids if pid not in resources]
+        if missing:
+            raise ValidationError({"public_id": f"Not uploaded to storage yet: {', '.join(missing)}"})
+
+        max_file_size_bytes = int(getattr(settings, "MATERIAL_MAX_FILE_SIZE", 20 * 1024 * 1024))
+        materials = []
+        for public_id, data in zip(public_ids, serializer.validated_data):
+            resource = resources[public_id]
+            if int(resource.get("bytes") or 0) > max_file_size_bytes:
+                raise ValidationError({"file": f"{public_id} is too large. Maximum allowed is {max_file_size_bytes} bytes."})
+            file_url = resource.get("secure_url") or resource.get("url")
+            if not file_url:
+                logger.error("No URL returned for direct upload resource=%s", resource)
+                raise APIException(detail="Upload succeeded but no file URL was returned by storage provider.")
+            materials.append(Material(
+                course=data["course"],
+                name=_truncate_field_if_needed(Material, "name", data["name"])[0],
+                tags=_truncate_field_if_needed(Material, "tags", data.get("tags", ""))[0],
+                file=file_url,
+                uploaded_by=request.user,
+            ))
+
+        try:
+            with transaction.atomic():
+                materials = Material.objects.bulk_create(materials, batch_size=500)
+                # bulk_create skips Material.save(), which maintains the search document
+                Material.objects.filter(pk__in=[m.pk for m in materials]).update(
+                    search_vector=material_search_vector()
+                )
+        except (DataError, IntegrityError) as e:
+            logger.exception("Database error bulk saving materials: %s", e)
+            raise APIException(detail=f"Database error saving materials: {str(e)}")
+
+        # One Material per signature
+        cache.delete_many(cache_keys)
+        return Response(MaterialSerializer(materials, many=True).data, status=status.HTTP_201_CREATED)
+
+
+class MaterialStatusView(APIView):
+    """
+    GET /api/materials/{id}/status/
+    Response: { "id": 42, "status": "uploading" | "ready" | "failed", "file_url": "https://..." | null }
+    Lets the uploader poll a queued upload until it is ready.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, pk):
+        material = (
+            Material.objects.filter(pk=pk, uploaded_by=request.user)
+            .values("id", "status", "file")
+            .first()
+        )
+        if material is None:
+            return Response({"detail": "Not found."}, status=status.HTTP_404_NOT_FOUND)
+        return Response({
+            "id": material["id"],
+            "status": material["status"],
+            "file_url": material["file"] or None,
+        }, status=status.HTTP_200_OK)
+
+
+def _download_etag(request, pk=None, **kwargs):
+    """
+    ETag for a material's download URL response.
+    Changes with the stored file and with the download window, the same
+    window the signed URL is cached for, so a 304 always means the client
+    already holds the URL we would send.
+    """
+    file_value = Material.objects.filter(pk=pk).values_list("file", flat=True).first()
+    if not file_value:
+        return None
+    return hashlib.md5(f"{pk}:{file_value}:{_download_window()}".encode()).hexdigest()
 
 
 class MaterialDownloadView(RetrieveAPIView):
     """
-    Return a download URL for the given material id.
+    Redirect to the download URL for the given material id.
     If Cloudinary resources are restricted (e.g., admin-only folder),
-    returns a signed URL. Otherwise returns public URL.
+    redirects to a signed URL. Otherwise to the public URL.
     
     GET /api/materials/download/{id}/
-    Response: { "download_url": "https://..." }
+    Response: 302 Location: https://...
     """
     queryset = Material.objects.all()
     serializer_class = MaterialSerializer
     permission_classes = [IsAuthenticated]
 
-    def retrieve(self, request, *args, **kwargs):
-        material = self.get_object()
+    def get_object(self):
+        # Signing only needs the stored file URL
+        obj = get_object_or_404(Material.objects.only("id", "file", "is_private"), pk=self.kwargs[self.lookup_field])
+        self.check_object_permissions(self.request, obj)
+        return obj
 
+    def get_download_url(self, material):
         # material.file is the Cloudinary URL string
         file_value = getattr(material, "file", None)
 
@@ -148,22 +552,89 @@ class MaterialDownloadView(RetrieveAPIView):
             logger.error("Material id=%s has no file value", material.id)
             raise APIException(detail="No file is associated with this material")
 
-        try:
-            # Pass the material instance to the helper (it will inspect .file/.url/.name)
-            # Generate signed URL (if needed) or fall back to public URL
-            # URLs are valid for 1 hour by default
+        # Public uploads are served from the stored URL as-is; only
+        # restricted files need signing
+        if (not material.is_private and file_value.startswith("https://res.cloudinary.com")
+                and "/upload/" in file_value):
+            return file_value
+
+        # Pass the material instance to the helper (it will inspect .file/.url/.name)
+        # Generate signed URL (if needed) or fall back to public URL; the
+        # helper handles its own signing failures and returns "" instead
+        # URLs are valid for 1 hour by default
+        # Cached per half-hour window (and per stored file), well inside
+        # the signature lifetime
+        file_hash = hashlib.md5(str(file_value).encode()).hexdigest()
+        cache_key = f"mat_dl:{material.id}:{_download_window()}:{file_hash}"
+        download_url = cache.get(cache_key)
+        if not download_url:
             download_url = get_cloudinary_signed_or_public_url(material, expires_in=3600)
-        except Exception as e:
-            logger.exception("Failed to generate download URL for Material id=%s", material.id)
-            raise APIException(detail="Failed to generate download URL")
+            if download_url:
+                cache.set(cache_key, download_url, DOWNLOAD_URL_CACHE_TTL)
 
         if not download_url:
             logger.error("No download URL available for Material id=%s", material.id)
             raise APIException(detail="Failed to generate download URL")
 
+        return download_url
+
+    def retrieve(self, request, *args, **kwargs):
+        # Send the browser straight to the CDN instead of making it fetch
+        # the URL and navigate again. The redirect may be reused for as long
+        # as the URL is cached here; the signature outlives that
+        response = HttpResponseRedirect(self.get_download_url(self.get_object()))
+        response["Cache-Control"] = f"private, max-age={DOWNLOAD_URL_CACHE_TTL}"
+        return response
+
+
+class MaterialDownloadURLView(MaterialDownloadView):
+    """
+    Return the download URL for the given material id, for clients that
+    open it themselves.
+    
+    GET /api/materials/{id}/url/
+    Response: { "download_url": "https://..." }
+    """
+
+    # A matching If-None-Match gets a 304 before any URL signing happens
+    @method_decorator(condition(etag_func=_download_etag))
+    def retrieve(self, request, *args, **kwargs):
+        download_url = self.get_download_url(self.get_object())
         return Response({"download_url": download_url}, status=status.HTTP_200_OK)
 
 
+class _EqualsAny(Lookup):
+    """lhs = ANY(rhs), for an array-valued rhs such as ArraySubquery."""
+    lookup_name = "equals_any"
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f"{lhs} = ANY({rhs})", (*lhs_params, *rhs_params)
+
+
+def _build_search_q(q, search_query):
+    """
+    Filter for the material search: full-text matches on search_vector (GIN)
+    or substring matches on name, tags and course name, which the trigram
+    indexes on UPPER(column) serve so partial words still match.
+
+    Every branch has to be answerable from an index on exams_material, or
+    Postgres falls back to scanning the whole table. The course-name match
+    is therefore resolved up front, as course_id = ANY(ARRAY(SELECT ...)):
+    an InitPlan that runs once against the course trigram index, leaving a
+    plain course_id lookup for the FK index. (A join, or IN (SELECT ...),
+    puts the course name in a per-row filter instead.)
+    """
+    matching_courses = ArraySubquery(Course.objects.filter(name__icontains=q).values("pk"))
+    return (
+        Q(search_vector=search_query) |
+        Q(name__icontains=q) |
+        Q(tags__icontains=q) |
+        Q(_EqualsAny(F("course_id"), matching_courses))
+    )
+
+
 class MaterialSearchView(ListAPIView):
     """
     GET /api/materials/search/?query=...
@@ -175,8 +646,8 @@ class MaterialSearchView(ListAPIView):
 
     def get_queryset(self):
         # Accept either ?query=term or accidentally encoded ?query[query]=term
-        raw_params = self.request.GET.dict()
-        logger.debug("Raw search GET params: %s", raw_params)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Raw search GET params: %s", self.request.GET.dict())
 
         q = self.request.query_params.get("query")
         # fallback for malformed/wrapped param names like query[query]
@@ -184,31 +655,43 @@ class MaterialSearchView(ListAPIView):
             q = self.request.query_params.get('query[query]') or self.request.query_params.get('query%5Bquery%5D')
 
         q = (q or "").strip()
-        logger.info(f"Material search initiated with query: '{q}'")
+        logger.info("Material search initiated with query: '%s'", q)
 
         if not q:
             logger.warning("Empty search query provided")
             return Material.objects.none()
         
-        # Build the filter with Q objects
+        # course is a forward FK, so the join yields one row per material
+        # and no DISTINCT is needed
+        search_query = SearchQuery(q, search_type="websearch", config=MATERIAL_SEARCH_CONFIG)
         queryset = Material.objects.filter(
-            Q(name__icontains=q) |
-            Q(tags__icontains=q) |
-            Q(course__name__icontains=q)
-        ).distinct()
+            _build_search_q(q, search_query)
+        ).annotate(
+            rank=SearchRank(F("search_vector"), search_query)
+        ).order_by("-rank", "-uploaded_at").select_related('course').only(*MATERIAL_LIST_FIELDS)
         
-        result_count = queryset.count()
-        logger.info(f"Search returned {result_count} results for query '{q}'")
+        # The paginator runs its own COUNT; only pay for another one when debugging
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Search returned %s results for query '%s'", queryset.count(), q)
         
         return queryset
 
 
+class MaterialCursorPagination(CursorPagination):
+    """Keyset pagination over (uploaded_at, id), newest first."""
+    page_size = 50
+    ordering = ('-uploaded_at', '-id')
+
+
 class MaterialListView(ListAPIView):
     """
     GET /api/materials/
-    Returns all materials (paginated) for the authenticated user.
+    Returns all materials (cursor-paginated, newest first) for the authenticated user.
+    Follow the `next` link for further pages; deep pages cost no OFFSET scan.
     Useful for browsing and testing.
     """
-    queryset = Material.objects.all().order_by('-uploaded_at')
+    # course_name is rendered for every row; join it instead of one query each
+    queryset = Material.objects.select_related('course').only(*MATERIAL_LIST_FIELDS)
     serializer_class = MaterialSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = MaterialCursorPagination
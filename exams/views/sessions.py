@@ -6,6 +6,7 @@ from django.shortcuts import get_object_or_404
 from django.utils import timezone
 from ..models import Course, Question, TestSession
 from ..serializers import TestSessionSerializer
+from .leaderboard import invalidate_leaderboard
 
 class StartTestAPIView(APIView):
     permission_classes = [permissions.IsAuthenticated]
@@ -30,6 +31,8 @@ class StartTestAPIView(APIView):
             duration=duration,
             question_count=len(chosen))
         session.questions.set(chosen)
+        # question_count feeds the leaderboard average as soon as a test starts
+        invalidate_leaderboard()
         serializer = TestSessionSerializer(session)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
@@ -41,14 +44,18 @@ class SubmitTestAPIView(APIView):
             TestSession, id=session_id, user=request.user
         )
         answers = request.data.get('answers', {})
+        # Load the questions once: scored here, then reused by the serializer
+        questions = list(session.questions.all())
+        session._prefetched_objects_cache = {'questions': questions}
         score = 0
-        for q in session.questions.all():
+        for q in questions:
             if str(answers.get(str(q.id), '')).upper() == q.correct_option.upper():
                 score += 1
 
         session.score = score
         session.end_time = timezone.now()
         session.save()
+        invalidate_leaderboard()
 
         serializer = TestSessionSerializer(session)
         return Response(serializer.data, status=status.HTTP_200_OK)
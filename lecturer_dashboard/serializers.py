@@ -4,6 +4,7 @@ Serializers for lecturer dashboard
 """
 from rest_framework import serializers
 from django.contrib.auth.models import User
+from django.db import transaction
 from .models import LecturerAccount
 
 class LecturerAccountSerializer(serializers.ModelSerializer):
@@ -51,23 +52,26 @@ class LecturerRegistrationSerializer(serializers.Serializer):
         logger = logging.getLogger(__name__)
 
         try:
-            # Create user
-            user = User.objects.create_user(
-                username=validated_data['username'],
-                email=validated_data['email'],
-                password=validated_data['password']
-            )
+            # Both rows commit together so a failed account insert doesn't
+            # leave a bare user that blocks re-registering the username
+            with transaction.atomic():
+                # Create user
+                user = User.objects.create_user(
+                    username=validated_data['username'],
+                    email=validated_data['email'],
+                    password=validated_data['password']
+                )
 
-            # Create lecturer account
-            lecturer_account = LecturerAccount.objects.create(
-                user=user,
-                name=validated_data['name'],
-                department=validated_data['department'],
-                faculty=validated_data['faculty'],
-                phone=validated_data['phone']
-            )
+                # Create lecturer account
+                LecturerAccount.objects.create(
+                    user=user,
+                    name=validated_data['name'],
+                    department=validated_data['department'],
+                    faculty=validated_data['faculty'],
+                    phone=validated_data['phone']
+                )
 
             return user
         except Exception as e:
-            logger.error(f"Error during lecturer registration: {str(e)}", exc_info=True)
+            logger.error("Error during lecturer registration: %s", e, exc_info=True)
             raise serializers.ValidationError({"detail": str(e)})
@@ -30,7 +30,7 @@ class LecturerRegisterView(APIView):
                 }, status=status.HTTP_201_CREATED)
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
-            logger.error(f"Lecturer registration error: {str(e)}", exc_info=True)
+            logger.error("Lecturer registration error: %s", e, exc_info=True)
             return Response({
                 'error': 'Registration failed',
                 'detail': str(e)
@@ -2,6 +2,7 @@ from rest_framework import status, viewsets
 from rest_framework.response import Response
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated, IsAdminUser, AllowAny
+from django.db.models import Count, Q
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
 from .models import ActivationCode, UserActivation, MonetizationSettings
@@ -89,8 +90,12 @@ class ActivationCodeViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'], permission_classes=[IsAdminUser])
     def usage_stats(self, request):
         """Get statistics on code usage"""
-        total = ActivationCode.objects.count()
-        used = ActivationCode.objects.filter(is_used=True).count()
+        stats = ActivationCode.objects.aggregate(
+            total=Count('id'),
+            used=Count('id', filter=Q(is_used=True)),
+        )
+        total = stats['total']
+        used = stats['used']
         unused = total - used
         
         return Response({
@@ -39,6 +39,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     'corsheaders',  # Make sure this is above all your own apps
     'rest_framework',
     'rest_framework_simplejwt',
@@ -126,13 +127,28 @@ WSGI_APPLICATION = "test_portal.wsgi.application"
 ASGI_APPLICATION = "test_portal.asgi.application"
 
 # Database
+# Persistent connections are reused across requests; health checks discard a
+# connection that died while idle. Set DB_TRANSACTION_POOLING=True when
+# DATABASE_URL points at a transaction-pooling PgBouncer: the pooler owns the
+# connections, and server-side cursors (QuerySet.iterator(), used by the
+# results export) can't outlive the transaction there, so both are turned off.
+DB_TRANSACTION_POOLING = os.getenv("DB_TRANSACTION_POOLING", "False") == "True"
 DATABASES = {
     "default": dj_database_url.config(
         default=os.getenv("DATABASE_URL"),
-        conn_max_age=600,
+        conn_max_age=0 if DB_TRANSACTION_POOLING else int(os.getenv("DB_CONN_MAX_AGE", 600)),
+        conn_health_checks=True,
         ssl_require=not DEBUG
     )
 }
+if DB_TRANSACTION_POOLING:
+    DATABASES["default"]["DISABLE_SERVER_SIDE_CURSORS"] = True
+
+# Authentication backends
+# Same checks as ModelBackend; repeat logins within 15s skip the password hasher
+AUTHENTICATION_BACKENDS = [
+    'exams.backends.CachedModelBackend',
+]
 
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
@@ -155,13 +171,18 @@ SIMPLE_JWT = {
 }
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'exams.authentication.CachedJWTAuthentication',
         # keep session auth if you want the browsable API to work with login sessions:
         'rest_framework.authentication.SessionAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
+    'DEFAULT_RENDERER_CLASSES': (
+        # orjson-backed JSON; falls back to DRF's encoder if orjson is missing
+        'exams.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
 }
@@ -193,6 +214,11 @@ CLOUDINARY_MAX_UPLOAD_MB = CLOUDINARY_MAX_UPLOAD_BYTES // (1024 * 1024)
 # Server-side material/file upload size limit used by the materials upload view.
 # Can be overridden with MATERIAL_MAX_FILE_SIZE env var (value in bytes).
 MATERIAL_MAX_FILE_SIZE = int(os.getenv("MATERIAL_MAX_FILE_SIZE", CLOUDINARY_MAX_UPLOAD_BYTES))
+# Upload materials to Cloudinary from the RQ worker and answer 202 right away.
+# The worker reads the spooled file, so it must see MATERIAL_UPLOAD_TMP_DIR
+# (defaults to the system temp dir).
+MATERIAL_ASYNC_UPLOADS = os.getenv("MATERIAL_ASYNC_UPLOADS", "False") == "True"
+MATERIAL_UPLOAD_TMP_DIR = os.getenv("MATERIAL_UPLOAD_TMP_DIR") or None
 CLOUDINARY = {
     "cloud_name": CLOUDINARY_STORAGE.get("CLOUD_NAME", "") or os.getenv("CLOUDINARY_CLOUD_NAME", ""),
 }
@@ -314,7 +340,13 @@ RQ_QUEUES = {
         "URL": REDIS_URL,
         # optional: how long a job can run before it's killed (seconds)
         "DEFAULT_TIMEOUT": int(os.getenv("RQ_DEFAULT_TIMEOUT", 3600)),
-    }
+    },
+    # Material uploads to Cloudinary; run a dedicated `rqworker cloudinary`
+    # so they scale separately from the default queue
+    "cloudinary": {
+        "URL": REDIS_URL,
+        "DEFAULT_TIMEOUT": int(os.getenv("RQ_CLOUDINARY_TIMEOUT", 900)),
+    },
 }
 
 # Optional convenience for django-rq admin/panel
@@ -324,5 +356,17 @@ DJANGO_RQ = {
     },
 }
 
+# Cache shared by every web worker and RQ worker. Direct-upload ownership
+# (sign on one worker, confirm on another) and invalidations such as the
+# leaderboard key must be visible to all processes, which the per-process
+# default (LocMemCache) cannot do.
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": os.getenv("CACHE_REDIS_URL", REDIS_URL),
+        "KEY_PREFIX": "petrox",
+    },
+}
+
 
 
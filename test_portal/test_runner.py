@@ -0,0 +1,17 @@
+from django.db import connections
+from django.db.models.signals import pre_migrate
+from django.test.runner import DiscoverRunner
+
+
+def create_extensions(using, **kwargs):
+    # The trigram indexes need pg_trgm before the tables are created
+    with connections[using].cursor() as cursor:
+        cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+
+class PostgresTestRunner(DiscoverRunner):
+    """DiscoverRunner that installs the Postgres extensions the models use."""
+
+    def setup_databases(self, **kwargs):
+        pre_migrate.connect(create_extensions, dispatch_uid="create_test_extensions")
+        return super().setup_databases(**kwargs)